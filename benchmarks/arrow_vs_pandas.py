@@ -0,0 +1,92 @@
+"""Compare the Arrow/polars result path with the previous pandas `.df()` path.
+
+    python benchmarks/arrow_vs_pandas.py
+    python benchmarks/arrow_vs_pandas.py --data data/processed/amazon_sales.parquet --repeat 50
+
+For each query the dashboard runs, reports the median latency from execute()
+to a frame ready for plotly (including the per-panel slicing for snapshots)
+and the in-memory size of the result.
+"""
+import argparse
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from queries import (  # noqa: E402
+    SALES_COLUMNS, SNAPSHOT_PANELS, SEASON_ORDER, build_sales_cube, compile_filters, create_sales_view,
+    snapshot_panel, _snapshot_sql,
+)
+
+import pandas as pd  # noqa: E402
+
+DEFAULT_FILTERS = ([2022, 2023], list(range(1, 13)), ["Beauty", "Books", "Electronics"], ["Asia", "Europe", "Middle East", "North America"])
+
+
+def pandas_panel(snapshot, panel):
+    """snapshot_panel() as it was before the Arrow path: pandas slicing of a `.df()` result."""
+    keys = list(SNAPSHOT_PANELS[panel])
+    d = snapshot.loc[snapshot["panel"] == panel, [*keys, "total_revenue", "order_id"]]
+    if "season" in keys:
+        d = d.assign(season=pd.Categorical(d["season"], SEASON_ORDER, ordered=True))
+    if keys:
+        d = d.sort_values(keys)
+    return d.reset_index(drop=True)
+
+
+def pandas_size(frame):
+    return int(frame.memory_usage(index=True, deep=True).sum())
+
+
+def polars_size(frame):
+    return int(frame.estimated_size())
+
+
+def timed(fn, repeat):
+    """Median seconds per call and the last result."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times), result
+
+
+def run(data, repeat):
+    con = duckdb.connect()
+    create_sales_view(con, data)
+    build_sales_cube(con)
+
+    cases = {}
+    for source in ["sales_cube", "sales"]:
+        sql, params = _snapshot_sql(source), compile_filters(*DEFAULT_FILTERS, source=source)[1]
+        cases[f"snapshot ({source})"] = (
+            lambda sql=sql, params=params: [pandas_panel(con.execute(sql, params).df(), p) for p in SNAPSHOT_PANELS],
+            lambda sql=sql, params=params: [snapshot_panel(con.execute(sql, params).pl(), p) for p in SNAPSHOT_PANELS],
+        )
+    full = f"SELECT {', '.join(SALES_COLUMNS)} FROM sales"
+    cases["full table"] = (lambda: [con.execute(full).df()], lambda: [con.execute(full).pl()])
+
+    print(f"{'query':<22} {'path':<8} {'median ms':>10} {'result KB':>10}")
+    for name, (pandas_fn, arrow_fn) in cases.items():
+        for label, fn, size in [("pandas", pandas_fn, pandas_size), ("arrow", arrow_fn, polars_size)]:
+            seconds, frames = timed(fn, repeat)
+            kb = sum(size(f) for f in frames) / 1024
+            print(f"{name:<22} {label:<8} {seconds * 1000:>10.2f} {kb:>10.1f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=str(ROOT / "data" / "processed" / "amazon_sales"), help="parquet file or partitioned dataset")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args(argv)
+    run(args.data, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
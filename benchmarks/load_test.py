@@ -0,0 +1,270 @@
+"""Replay concurrent analyst sessions against a local app and report render latency.
+
+    python benchmarks/load_test.py --users 20 --iterations 5
+    python benchmarks/load_test.py --users 50 --llm-delay 1.5 --json load.json
+
+Starts `shiny run src/app.py` and the LLM stub (tests/llm_stub.py), then opens
+one websocket per simulated user speaking the Shiny session protocol directly.
+Each user renders the dashboard, then replays a script of sidebar filter,
+metric and granularity changes and AI Assistant questions with random think
+time between them. For every step the time from sending the input to the last
+watched output arriving is recorded, and the report gives p50 / p95 / p99 per
+step kind together with the server's resident memory before, during and after
+the run (read from /proc, so RSS is only reported on Linux).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import re
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import websockets
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "tests"))
+
+from llm_stub import start_stub_server  # noqa: E402
+
+YEARS = ["2022", "2023"]
+CATEGORIES = ["Beauty", "Books", "Electronics", "Fashion", "Home & Kitchen", "Sports"]
+REGIONS = ["Asia", "Europe", "Middle East", "North America"]
+GRANULARITIES = ["day", "week", "month", "quarter"]
+
+# Questions answered by the local fast path and ones that need the (stubbed) model
+AI_QUERIES = [
+    "books in asia 2023",
+    "how did electronics sell in europe during 2022",
+    "sports paid by upi",
+    "show me fashion and beauty orders in the middle east",
+    "north america 2023 wallet",
+]
+
+DASHBOARD_OUTPUTS = ["valuebox_revenue", "valuebox_orders", "plot_trend", "plot_map", "plot_season", "payment_method_bar"]
+AI_OUTPUTS = ["ai_status", "ai_chat_history", "ai_filtered_table", "ai_page_info", "ai_plot_trend", "ai_plot_season"]
+CHART_OUTPUTS = ["plot_trend", "plot_season", "payment_method_bar"]
+
+STEP_TIMEOUT_S = 60
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def rss_mb(pid):
+    """(current, peak) resident memory of a process in MB, or (None, None) off Linux."""
+    try:
+        status = Path(f"/proc/{pid}/status").read_text()
+    except OSError:
+        return None, None
+    fields = dict(re.findall(r"^(VmRSS|VmHWM):\s+(\d+) kB", status, re.M))
+    return int(fields["VmRSS"]) / 1024, int(fields["VmHWM"]) / 1024
+
+
+def percentiles(samples):
+    """p50 / p95 / p99 / max in milliseconds of a list of seconds."""
+    if not samples:
+        return {}
+    ms = sorted(s * 1000 for s in samples)
+    cuts = statistics.quantiles(ms, n=100, method="inclusive") if len(ms) > 1 else ms * 99
+    return {"count": len(ms), "p50": cuts[49], "p95": cuts[94], "p99": cuts[98], "max": ms[-1]}
+
+
+class SimulatedUser:
+    """One browser session: sends input updates and waits for the outputs they change."""
+
+    def __init__(self, port, rng):
+        self.port, self.rng = port, rng
+        self.ws = None
+        self.state = {
+            "input_year": list(YEARS), "input_month": [str(m) for m in range(1, 13)],
+            "input_category": ["Beauty", "Books", "Electronics"], "input_region": list(REGIONS),
+            "input_metric": "total_revenue", "input_granularity": "month", "input_season": True,
+        }
+        self.ai_queries = itertools.cycle(rng.sample(AI_QUERIES, len(AI_QUERIES)))
+        self.ai_clicks = 0
+
+    async def connect(self):
+        self.ws = await websockets.connect(f"ws://127.0.0.1:{self.port}/websocket/", max_size=None)
+        return await self._send("init", {
+            **self.state,
+            **{f".clientdata_output_{o}_hidden": False for o in DASHBOARD_OUTPUTS + AI_OUTPUTS},
+            **{f".clientdata_output_{o}_width": 600 for o in DASHBOARD_OUTPUTS},
+            "reset_btn:shiny.action": 0, "run_ai_query:shiny.action": 0, "ai_query": "",
+            "ai_sort": "order_id", "ai_sort_dir": "asc", "ai_filter_column": "product_category", "ai_filter_text": "",
+            "ai_prev:shiny.action": 0, "ai_next:shiny.action": 0,
+            ".clientdata_url_hostname": "127.0.0.1", ".clientdata_url_port": str(self.port),
+            ".clientdata_url_pathname": "/", ".clientdata_url_protocol": "http:", ".clientdata_url_search": "",
+            ".clientdata_pixelratio": 1,
+        }, {"valuebox_revenue": None, "plot_trend": None, "ai_page_info": None})
+
+    async def close(self):
+        if self.ws is not None:
+            await self.ws.close()
+
+    def next_step(self):
+        """(kind, input update, {output id: predicate or None}) for the next scripted action."""
+        kind = self.rng.choice(["region", "region", "category", "metric", "granularity", "ai"])
+        if kind == "ai":
+            self.ai_clicks += 1
+            not_thinking = lambda value: "Thinking" not in json.dumps(value)
+            return kind, {"ai_query": next(self.ai_queries), "run_ai_query:shiny.action": self.ai_clicks}, {
+                "ai_status": not_thinking, "ai_filtered_table": None,
+            }
+        if kind == "metric":
+            metric = "order_id" if self.state["input_metric"] == "total_revenue" else "total_revenue"
+            return kind, {"input_metric": metric}, dict.fromkeys(CHART_OUTPUTS)
+        if kind == "granularity":
+            choice = self.rng.choice([g for g in GRANULARITIES if g != self.state["input_granularity"]])
+            return kind, {"input_granularity": choice}, {"plot_trend": None}
+
+        key, values = ("input_region", REGIONS) if kind == "region" else ("input_category", CATEGORIES)
+        while True:
+            picked = sorted(self.rng.sample(values, self.rng.randint(1, len(values))))
+            if picked != sorted(self.state[key]):
+                return kind, {key: picked}, {"valuebox_revenue": None, **dict.fromkeys(CHART_OUTPUTS)}
+
+    async def step(self, update, wait_for):
+        self.state.update({k: v for k, v in update.items() if k in self.state})
+        return await self._send("update", update, wait_for)
+
+    async def _send(self, method, data, wait_for):
+        """Seconds from sending the message until every watched output has a matching value."""
+        pending = dict(wait_for)
+        start = time.perf_counter()
+        await self.ws.send(json.dumps({"method": method, "data": data}))
+        async with asyncio.timeout(STEP_TIMEOUT_S):
+            while pending:
+                raw = re.sub(r"^[a-f0-9]+#\d+\|", "", await self.ws.recv())
+                if raw.startswith('{"custom"'):
+                    continue  # widget comm traffic; output values arrive separately
+                message = json.loads(raw)
+                if message.get("errors"):
+                    raise RuntimeError(f"output errors: {message['errors']}")
+                for output, value in message.get("values", {}).items():
+                    check = pending.get(output, False)
+                    if check is None or (check and check(value)):
+                        del pending[output]
+        return time.perf_counter() - start
+
+
+async def run_user(port, seed, iterations, think_s, samples, failures):
+    user = SimulatedUser(port, random.Random(seed))
+    try:
+        samples["initial render"].append(await user.connect())
+        for _ in range(iterations):
+            await asyncio.sleep(user.rng.uniform(0, think_s))
+            kind, update, wait_for = user.next_step()
+            samples[kind].append(await user.step(update, wait_for))
+    except Exception as e:  # noqa: BLE001 - report and keep the other users running
+        failures.append(f"user {seed}: {type(e).__name__}: {e}")
+    finally:
+        await user.close()
+
+
+async def _wait_for_port(port, proc, timeout=60):
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError("app exited during startup")
+        try:
+            socket.create_connection(("127.0.0.1", port), 0.2).close()
+            return
+        except OSError:
+            await asyncio.sleep(0.1)
+    raise TimeoutError("app did not start")
+
+
+async def _sample_rss(pid, peak, stop):
+    while not stop.is_set():
+        current, _ = rss_mb(pid)
+        if current is not None:
+            peak[0] = max(peak[0], current)
+        await asyncio.sleep(0.2)
+
+
+async def run(users=10, iterations=5, think_s=2.0, llm_delay=0.5, ramp_s=1.0, seed=0, env=None):
+    """Run the load test and return the report as a dict."""
+    stub, url = start_stub_server(delay=llm_delay)
+    port = _free_port()
+    with tempfile.TemporaryDirectory() as tmp:
+        proc = subprocess.Popen(
+            [sys.executable, "-m", "shiny", "run", "--port", str(port), str(ROOT / "src" / "app.py")],
+            env={**os.environ, "GITHUB_TOKEN": "stub", "GITHUB_MODELS_URL": url,
+                 "AI_MEMO_PATH": str(Path(tmp) / "memo.json"), **(env or {})},
+            stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+        )
+        try:
+            await _wait_for_port(port, proc)
+            rss_idle, _ = rss_mb(proc.pid)
+            samples = {k: [] for k in ["initial render", "region", "category", "metric", "granularity", "ai"]}
+            failures, peak, stop = [], [0.0], asyncio.Event()
+            sampler = asyncio.create_task(_sample_rss(proc.pid, peak, stop))
+
+            start = time.perf_counter()
+            tasks = []
+            for i in range(users):
+                tasks.append(asyncio.create_task(run_user(port, seed + i, iterations, think_s, samples, failures)))
+                await asyncio.sleep(ramp_s / max(users, 1))
+            await asyncio.gather(*tasks)
+            elapsed = time.perf_counter() - start
+
+            stop.set()
+            await sampler
+            rss_after, rss_hwm = rss_mb(proc.pid)
+        finally:
+            proc.terminate()
+            proc.wait(timeout=10)
+            stub.shutdown()
+
+    steps = [s for kind, v in samples.items() if kind != "initial render" for s in v]
+    return {
+        "users": users, "iterations": iterations, "elapsed_s": elapsed, "failures": failures,
+        "latency_ms": {**{k: percentiles(v) for k, v in samples.items() if v}, "all steps": percentiles(steps)},
+        "rss_mb": {"idle": rss_idle, "peak": max(peak[0], rss_hwm or 0) or None, "after": rss_after},
+    }
+
+
+def print_report(report):
+    print(f"{report['users']} users x {report['iterations']} steps in {report['elapsed_s']:.1f}s")
+    print(f"{'step':<16} {'count':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+    for kind, p in report["latency_ms"].items():
+        if p:
+            print(f"{kind:<16} {p['count']:>6} {p['p50']:>9.0f} {p['p95']:>9.0f} {p['p99']:>9.0f} {p['max']:>9.0f}")
+    rss = report["rss_mb"]
+    if rss["idle"] is not None:
+        print(f"server RSS: idle {rss['idle']:.0f} MB, peak {rss['peak']:.0f} MB, after {rss['after']:.0f} MB")
+    for failure in report["failures"]:
+        print(f"FAILED {failure}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--users", type=int, default=10, help="concurrent sessions")
+    parser.add_argument("--iterations", type=int, default=5, help="scripted steps per user after the first render")
+    parser.add_argument("--think", type=float, default=2.0, help="max seconds of think time before each step")
+    parser.add_argument("--llm-delay", type=float, default=0.5, help="seconds the LLM stub takes to answer")
+    parser.add_argument("--ramp", type=float, default=1.0, help="seconds over which users connect")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    report = asyncio.run(run(args.users, args.iterations, args.think, args.llm_delay, args.ramp, args.seed))
+    print_report(report)
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+    sys.exit(1 if report["failures"] else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""Time every dashboard computation against stored baselines.
+
+    python benchmarks/suite.py                        # 50k rows, compare with baselines
+    python benchmarks/suite.py --scale 1m --scale 10m
+    python benchmarks/suite.py --scale real           # data/processed/amazon_sales
+    python benchmarks/suite.py --scale 1m --update-baselines
+    python benchmarks/suite.py --scale 1m --database     # prebuilt DuckDB file
+
+Synthetic datasets come from benchmarks/synthetic.py and are generated into
+data/synthetic/ on first use. Each case runs the same src/queries.py,
+src/downsample.py and src/export.py calls as src/app.py and reports its median
+latency; a case is a regression when it is slower than its baseline by more
+than --threshold (relative) and --min-delta-ms (absolute), and the script then
+exits with status 1. Baselines are machine specific: regenerate them with
+--update-baselines on the machine you compare on.
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from build_db import build_database  # noqa: E402
+from downsample import downsample  # noqa: E402
+from export import stream_csv  # noqa: E402
+from queries import (  # noqa: E402
+    SNAPSHOT_PANELS, build_sales_cube, create_sales_view, query_ai_batches, query_ai_count, query_ai_page,
+    query_ai_summary, query_dashboard_snapshot, query_totals, query_trend, snapshot_panel, trend_panel,
+)
+from synthetic import SCALES, dataset_for  # noqa: E402
+
+BASELINES_PATH = ROOT / "benchmarks" / "baselines.json"
+REAL_DATA = ROOT / "data" / "processed" / "amazon_sales"
+
+# A typical dashboard selection and AI Assistant answer
+DEFAULT_FILTERS = ([2022, 2023], list(range(1, 13)), ["Beauty", "Books", "Electronics"], ["Asia", "Europe", "Middle East", "North America"])
+AI_SPEC = {"years": [2023], "categories": ["Books", "Electronics"], "regions": [], "payment_methods": []}
+TREND_POINTS = 800
+
+
+def benchmark_cases(con):
+    """Name -> zero-argument callable for each dashboard computation, in report order."""
+    snapshot = query_dashboard_snapshot(con, DEFAULT_FILTERS)
+
+    def map_summary():
+        region = snapshot_panel(query_dashboard_snapshot(con, DEFAULT_FILTERS), "region")
+        return dict(zip(region["customer_region"], region["total_revenue"]))
+
+    def daily_trend():
+        trend = query_trend(con, DEFAULT_FILTERS, "day")
+        return downsample(trend_panel(trend, "trend"), "period_start", "total_revenue", TREND_POINTS, by="product_category")
+
+    def csv_export():
+        return sum(len(chunk) for chunk in stream_csv(query_ai_batches(con, AI_SPEC)))
+
+    return {
+        "cube build": lambda: build_sales_cube(con),
+        "value boxes": lambda: query_totals(con, DEFAULT_FILTERS),
+        "filtered query (fact)": lambda: query_dashboard_snapshot(con, DEFAULT_FILTERS, "sales"),
+        "snapshot (cube)": lambda: query_dashboard_snapshot(con, DEFAULT_FILTERS),
+        "panel slicing": lambda: [snapshot_panel(snapshot, p) for p in SNAPSHOT_PANELS],
+        "map summary": map_summary,
+        "daily trend + lttb": daily_trend,
+        "ai summary": lambda: query_ai_summary(con, AI_SPEC),
+        "ai count": lambda: query_ai_count(con, AI_SPEC),
+        "ai page (sorted)": lambda: query_ai_page(con, AI_SPEC, "total_revenue", True, offset=1000),
+        "csv export": csv_export,
+    }
+
+
+def timed(fn, repeat):
+    """Median milliseconds per call, after one warm-up call."""
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1000
+
+
+def run_scale(scale, repeat, seed=0, database=False):
+    """Median milliseconds per case for one scale, on parquet or on a database from src/build_db.py."""
+    data = REAL_DATA if scale == "real" else dataset_for(scale, seed)
+    if database:
+        db_path = Path(data).with_suffix(".duckdb")
+        if not db_path.exists():
+            build_database(data, db_path)
+        con = duckdb.connect(str(db_path), read_only=True)
+        cases = benchmark_cases(con)
+        del cases["cube build"]  # prebuilt in the read-only file
+    else:
+        con = duckdb.connect()
+        create_sales_view(con, data)
+        build_sales_cube(con)
+        cases = benchmark_cases(con)
+    return {name: timed(fn, repeat) for name, fn in cases.items()}
+
+
+def compare(results, baselines, threshold, min_delta_ms):
+    """(case, ms, baseline ms or None, regressed) rows for one scale."""
+    rows = []
+    for name, ms in results.items():
+        base = baselines.get(name)
+        regressed = base is not None and ms > base * (1 + threshold) and ms - base > min_delta_ms
+        rows.append((name, ms, base, regressed))
+    return rows
+
+
+def load_baselines(path=BASELINES_PATH):
+    path = Path(path)
+    return json.loads(path.read_text()) if path.exists() else {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scale", action="append", choices=[*SCALES, "real"], help="dataset scale (repeatable, default 50k)")
+    parser.add_argument("--repeat", type=int, default=int(os.getenv("BENCH_REPEAT", "10")))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--database", action="store_true", help="query a src/build_db.py database instead of parquet")
+    parser.add_argument("--threshold", type=float, default=float(os.getenv("BENCH_THRESHOLD", "0.3")),
+                        help="relative slowdown counted as a regression (default 0.3)")
+    parser.add_argument("--min-delta-ms", type=float, default=1.0, help="ignore slowdowns smaller than this")
+    parser.add_argument("--baselines", default=str(BASELINES_PATH))
+    parser.add_argument("--update-baselines", action="store_true", help="store this run as the baselines")
+    args = parser.parse_args(argv)
+
+    baselines = load_baselines(args.baselines)
+    regressions = 0
+    for name in args.scale or ["50k"]:
+        scale = f"{name}-duckdb" if args.database else name
+        results = run_scale(name, args.repeat, args.seed, args.database)
+        print(f"\n{scale}: {'case':<22} {'median ms':>10} {'baseline':>10} {'change':>8}")
+        for case, ms, base, regressed in compare(results, baselines.get(scale, {}), args.threshold, args.min_delta_ms):
+            base_ms, change = (f"{base:.2f}", f"{(ms / base - 1) * 100:+.0f}%") if base else ("-", "new")
+            print(f"{'':<{len(scale) + 2}}{case:<22} {ms:>10.2f} {base_ms:>10} {change:>8}{'  REGRESSION' if regressed else ''}")
+            regressions += regressed
+        if args.update_baselines:
+            baselines[scale] = {case: round(ms, 3) for case, ms in results.items()}
+
+    if args.update_baselines:
+        Path(args.baselines).write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"\nBaselines written to {args.baselines}")
+    elif regressions:
+        print(f"\n{regressions} case(s) slower than baseline by more than {args.threshold:.0%}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
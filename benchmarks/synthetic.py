@@ -0,0 +1,112 @@
+"""Generate a synthetic amazon_sales dataset at benchmark scale.
+
+    python benchmarks/synthetic.py 1m
+    python benchmarks/synthetic.py 50m --out /tmp/amazon_sales_50m
+
+Rows have the columns, types and value ranges of data/processed/amazon_sales
+(two years of daily orders, the same categories, regions and payment methods)
+and are written with src/ingest.py's layout: Hive-partitioned by year and
+product category, sorted by order_date. Values are hashes of the row number,
+so a scale and seed always produce the same data.
+"""
+import argparse
+import sys
+import time
+from pathlib import Path
+
+import duckdb
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+
+from ingest import write_dataset  # noqa: E402
+
+SCALES = {"50k": 50_000, "1m": 1_000_000, "10m": 10_000_000, "50m": 50_000_000}
+SYNTHETIC_DIR = ROOT / "data" / "synthetic"
+
+CATEGORIES = ["Beauty", "Books", "Electronics", "Fashion", "Home & Kitchen", "Sports"]
+REGIONS = ["Asia", "Europe", "Middle East", "North America"]
+PAYMENT_METHODS = ["Cash on Delivery", "Credit Card", "Debit Card", "UPI", "Wallet"]
+DISCOUNTS = [0, 5, 10, 15, 20, 30]
+FIRST_DAY, DAYS = "2022-01-01", 730
+
+
+def _pick(values, column, seed):
+    """SQL choosing one of values per row, uniformly."""
+    return f"{values!r}[CAST(1 + hash(i, '{column}', {int(seed)}) % {len(values)} AS BIGINT)]"
+
+
+def _uniform(column, seed):
+    """SQL for a uniform value in [0, 1) per row."""
+    return f"(hash(i, '{column}', {int(seed)}) % 1000000) / 1000000.0"
+
+
+def synthetic_sql(rows, seed=0):
+    """SELECT producing `rows` synthetic sales rows plus `year`, typed like the processed parquet."""
+    return f"""
+        SELECT *, year(order_date) AS year
+        FROM (
+            SELECT
+                order_id, order_date, product_id, product_category, price, discount_percent,
+                quantity_sold, customer_region, payment_method, rating, review_count,
+                discounted_price,
+                round(discounted_price * quantity_sold, 2) AS total_revenue
+            FROM (
+                SELECT
+                    *,
+                    round(price * (100 - discount_percent) / 100, 2) AS discounted_price
+                FROM (
+                    SELECT
+                        CAST(i + 1 AS BIGINT) AS order_id,
+                        TIMESTAMP '{FIRST_DAY}' + to_days(CAST(hash(i, 'order_date', {int(seed)}) % {DAYS} AS INTEGER)) AS order_date,
+                        CAST(1000 + hash(i, 'product_id', {int(seed)}) % 4000 AS BIGINT) AS product_id,
+                        {_pick(CATEGORIES, 'product_category', seed)} AS product_category,
+                        round(5.01 + {_uniform('price', seed)} * 494.98, 2) AS price,
+                        CAST({_pick(DISCOUNTS, 'discount_percent', seed)} AS BIGINT) AS discount_percent,
+                        CAST(1 + hash(i, 'quantity_sold', {int(seed)}) % 5 AS BIGINT) AS quantity_sold,
+                        {_pick(REGIONS, 'customer_region', seed)} AS customer_region,
+                        {_pick(PAYMENT_METHODS, 'payment_method', seed)} AS payment_method,
+                        round(1 + {_uniform('rating', seed)} * 4, 1) AS rating,
+                        CAST(hash(i, 'review_count', {int(seed)}) % 500 AS BIGINT) AS review_count
+                    FROM range({int(rows)}) AS t(i)
+                )
+            )
+        )
+    """
+
+
+def generate(rows, out_dir, seed=0, con=None):
+    """Write a synthetic partitioned dataset of `rows` rows to out_dir; returns rows written."""
+    con = con or duckdb.connect()
+    return write_dataset(con, synthetic_sql(rows, seed), out_dir)
+
+
+def dataset_for(scale, seed=0):
+    """Path of the synthetic dataset for a named scale, generating it on first use."""
+    out_dir = SYNTHETIC_DIR / f"{scale}-seed{seed}"
+    if not any(out_dir.glob("**/*.parquet")):
+        start = time.perf_counter()
+        rows = generate(SCALES[scale], out_dir, seed)
+        print(f"Generated {rows:,} rows in {out_dir} ({time.perf_counter() - start:.1f}s)", file=sys.stderr)
+    return out_dir
+
+
+def parse_rows(value):
+    """Row count from a scale name ("10m") or a plain integer."""
+    return SCALES.get(value.lower()) or int(value.replace("_", ""))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("rows", help=f"row count or one of {', '.join(SCALES)}")
+    parser.add_argument("--out", help="dataset directory (default data/synthetic/<rows>-seed<seed>)")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    out = args.out or SYNTHETIC_DIR / f"{args.rows.lower()}-seed{args.seed}"
+    rows = generate(parse_rows(args.rows), out, args.seed)
+    print(f"Wrote {rows:,} rows to {out}")
+
+
+if __name__ == "__main__":
+    main()
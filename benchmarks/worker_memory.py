@@ -0,0 +1,127 @@
+"""Measure per-worker memory when N app processes serve the same dataset.
+
+    python benchmarks/worker_memory.py --workers 4
+    python benchmarks/worker_memory.py --workers 4 --scale 1m --store parquet --store shared
+
+Shiny keeps each session's state in the process that accepted its websocket,
+so the app scales out as N independent `shiny run` processes behind a load
+balancer with sticky sessions (see README). This script starts --workers such
+processes on consecutive ports for each DATA_STORE mode, drives one session
+per worker through the dashboard, a daily trend and an AI Assistant question
+(both read the fact table), and then reports every worker's memory from
+/proc/<pid>/smaps_rollup: Rss counts pages shared with other workers in full,
+Pss splits them between the processes mapping them, and Private is what each
+extra worker really costs. Linux only.
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import subprocess
+import sys
+import tempfile
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT / "src"))
+sys.path.insert(0, str(ROOT / "benchmarks"))
+
+from build_db import build_database, default_data_path, export_arrow  # noqa: E402
+from load_test import SimulatedUser, _free_port, _wait_for_port  # noqa: E402
+from store import _is_current  # noqa: E402
+from synthetic import SCALES, dataset_for  # noqa: E402
+
+STORES = ["parquet", "duckdb", "shared"]
+
+
+def smaps_mb(pid):
+    """Rss / Pss / Private / Shared memory of a process in MB."""
+    fields = dict(re.findall(r"^(\w+):\s+(\d+) kB", Path(f"/proc/{pid}/smaps_rollup").read_text(), re.M))
+    kb = {k: int(v) for k, v in fields.items()}
+    return {
+        "rss": kb["Rss"] / 1024,
+        "pss": kb["Pss"] / 1024,
+        "private": (kb["Private_Clean"] + kb["Private_Dirty"]) / 1024,
+        "shared": (kb["Shared_Clean"] + kb["Shared_Dirty"]) / 1024,
+    }
+
+
+def prepare(data_path):
+    """Build the database and Arrow file for data_path next to it unless they are current; returns the database path."""
+    db_path = Path(data_path).with_suffix(".duckdb")
+    arrow_path = db_path.with_suffix(".arrow")
+    if _is_current(db_path, data_path) is None:
+        build_database(data_path, db_path)
+    if not arrow_path.exists() or arrow_path.stat().st_mtime < db_path.stat().st_mtime:
+        export_arrow(db_path, arrow_path)
+    return db_path
+
+
+async def drive(port, seed):
+    """One session: first render, a daily trend and an AI Assistant question."""
+    user = SimulatedUser(port, random.Random(seed))
+    try:
+        await user.connect()
+        await user.step({"input_granularity": "day"}, {"plot_trend": None})
+        not_thinking = lambda value: "Thinking" not in json.dumps(value)
+        await user.step({"ai_query": "books in asia 2023", "run_ai_query:shiny.action": 1},
+                        {"ai_status": not_thinking, "ai_filtered_table": None})
+    finally:
+        await user.close()
+
+
+async def run(store, workers, data_path, db_path):
+    """Memory of every worker after one session each, for one DATA_STORE mode."""
+    with tempfile.TemporaryDirectory() as tmp:
+        env = {**os.environ, "DATA_PATH": str(data_path), "DUCKDB_PATH": str(db_path), "DATA_STORE": store,
+               "WARM_START_DIR": str(Path(tmp) / "warm_start"), "AI_MEMO_PATH": str(Path(tmp) / "memo.json")}
+        ports = [_free_port() for _ in range(workers)]
+        procs = []
+        try:
+            for port in ports:
+                procs.append(subprocess.Popen(
+                    [sys.executable, "-m", "shiny", "run", "--port", str(port), str(ROOT / "src" / "app.py")],
+                    env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+                ))
+                # Start workers one at a time so the first one writes the warm-start files
+                await _wait_for_port(port, procs[-1], timeout=300)
+            await asyncio.gather(*(drive(port, i) for i, port in enumerate(ports)))
+            return [smaps_mb(p.pid) for p in procs]
+        finally:
+            for p in procs:
+                p.terminate()
+            for p in procs:
+                p.wait(timeout=10)
+
+
+def print_report(store, memory):
+    total = {k: sum(m[k] for m in memory) for k in memory[0]}
+    print(f"\n{store}: {'worker':<8} {'rss MB':>8} {'pss MB':>8} {'private MB':>11} {'shared MB':>10}")
+    for i, m in enumerate(memory + [total]):
+        label = "total" if i == len(memory) else str(i)
+        print(f"{'':<{len(store) + 2}}{label:<8} {m['rss']:>8.0f} {m['pss']:>8.0f} {m['private']:>11.0f} {m['shared']:>10.0f}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4, help="app processes per store")
+    parser.add_argument("--scale", choices=[*SCALES, "real"], default="real", help="dataset (default: data/processed)")
+    parser.add_argument("--store", action="append", choices=STORES, help="DATA_STORE mode (repeatable, default all)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="also write the report to this file")
+    args = parser.parse_args(argv)
+
+    data_path = default_data_path() if args.scale == "real" else dataset_for(args.scale, args.seed)
+    db_path = prepare(data_path)
+    report = {}
+    for store in args.store or STORES:
+        report[store] = asyncio.run(run(store, args.workers, data_path, db_path))
+        print_report(store, report[store])
+    if args.json:
+        Path(args.json).write_text(json.dumps(report, indent=2) + "\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,30 @@
-from shiny import App, ui, reactive, render, req
+from shiny import App, ui, reactive, render
 from shinywidgets import output_widget, render_widget
-import pandas as pd
 from pathlib import Path
-import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-import matplotlib.pyplot as plt
-from matplotlib.ticker import FuncFormatter
+import asyncio
+import functools
+import hashlib
 import os
-import json
-import requests
-import duckdb
+from lazy import lazy_import
+from queries import (
+    SALES_COLUMNS, normalize_filters, query_vocabularies, query_totals,
+    query_dashboard_snapshot, snapshot_panel, query_ai_count, query_ai_page,
+    query_ai_batches, query_ai_summary, ai_summary_panel, normalize_ai_spec, query_trend, trend_panel,
+)
+from cache import ResultCache, dataset_fingerprint
+from build_db import DATABASE_PATH, default_data_path
+from store import open_store, store_version
+from reload import DatasetWatcher
+from db import QueryPool
+from assistant import QueryMemo, resolve_query
+from export import stream_csv, stream_parquet
+from debounce import debounce
+from downsample import downsample
+import instrument
+
+# plotly is the slowest import; load it when something first renders
+px = lazy_import("plotly.express")
+go = lazy_import("plotly.graph_objects")
 
 # =============================================================================
 # 1. Data Loading and Preprocessing
@@ -24,23 +38,162 @@ import duckdb
 
 
 
-PARQUET_PATH = Path(__file__).resolve().parent.parent / "data" / "processed" / "amazon_sales.parquet"
+# Parquet file or partitioned dataset (DATA_PATH); by default the output of
+# src/ingest.py, falling back to data/processed/amazon_sales.parquet
+DATA_PATH = Path(os.getenv("DATA_PATH") or default_data_path())
+
+# How the data is served (DATA_STORE, see src/store.py): "auto" uses the
+# read-only database from src/build_db.py (DUCKDB_PATH) when it matches the
+# data, "shared" memory-maps its Arrow copy so several workers share one
+# dataset in the OS page cache, and "parquet" queries the files directly.
+DUCKDB_PATH = Path(os.getenv("DUCKDB_PATH", str(DATABASE_PATH)))
+DATA_STORE = os.getenv("DATA_STORE", "auto")
+
+con, snapshot_source, setup_cursor = open_store(DATA_PATH, DUCKDB_PATH, mode=DATA_STORE)
+
+def read_store_info(con):
+    """Sidebar choices, AI Assistant vocabulary and dataset-wide totals of an opened store."""
+    # Dimension vocabularies come from cheap DISTINCT queries on the cube
+    vocab = query_vocabularies(con)
+    years = list(range(vocab["min_year"], vocab["max_year"] + 1))
 
-con = duckdb.connect()
+    # Values the AI Assistant may pick filters from
+    assistant_vocab = {
+        "categories": vocab["categories"],
+        "regions": vocab["regions"],
+        "payment_methods": vocab["payment_methods"],
+        "years": years,
+    }
+
+    # Dataset-wide totals for the value boxes only change with the data, so compute them once
+    overall_revenue, overall_orders = query_totals(con)
+    return ([str(y) for y in years], vocab["categories"], vocab["regions"], vocab["payment_methods"],
+            assistant_vocab, overall_revenue, overall_orders)
 
-con.execute(f"""
-    CREATE OR REPLACE VIEW sales AS
-    SELECT * FROM read_parquet('{PARQUET_PATH.as_posix()}')
-""")
+year_choices, categories, regions, payment_methods, assistant_vocab, overall_revenue, overall_orders = read_store_info(con)
 
-df = con.execute(f"SELECT * FROM read_parquet('{PARQUET_PATH.as_posix()}')").df()
-df["total_revenue"] = pd.to_numeric(df["total_revenue"], errors="coerce").fillna(0)
+# Earlier LLM answers, shared by all sessions and kept across restarts
+query_memo = QueryMemo(os.getenv("AI_MEMO_PATH", str(Path(__file__).resolve().parent.parent / "data" / "cache" / "ai_query_memo.json")))
 
+# Snapshots are shared across sessions, keyed on the normalized filter tuple.
+# The metric is not part of the key because every snapshot carries both metrics.
+snapshot_cache = ResultCache(
+    max_entries=int(os.getenv("SNAPSHOT_CACHE_ENTRIES", "256")),
+    max_bytes=int(os.getenv("SNAPSHOT_CACHE_MB", "64")) * 1024 * 1024,
+    version=dataset_fingerprint(DATA_PATH),
+)
 
-min_year, max_year = int(df["order_date"].dt.year.min()), int(df["order_date"].dt.year.max())
-year_choices = [str(y) for y in range(min_year, max_year + 1)]
-categories = sorted(df["product_category"].dropna().unique().tolist())
-regions = sorted(df["customer_region"].dropna().unique().tolist())
+# Sessions query through per-thread cursors on a bounded pool (DUCKDB_MAX_CONCURRENCY),
+# so one slow query never blocks the event loop for every other session.
+query_pool = QueryPool(con, setup=setup_cursor)
+
+# Cache counters on /metrics when INSTRUMENT is on
+instrument.register_gauge("app_snapshot_cache", "Shared result cache counters.", snapshot_cache.stats)
+
+async def get_dashboard_snapshot(filters):
+    """Return the dashboard snapshot for normalized filters, querying the pool on a cache miss."""
+    return await snapshot_cache.get_or_compute_async(
+        filters,
+        lambda: query_pool.run_async(query_dashboard_snapshot, filters, snapshot_source),
+    )
+
+async def get_trend(filters, granularity):
+    """Return the trend series for normalized filters at a day/week/quarter granularity."""
+    return await snapshot_cache.get_or_compute_async(
+        ("trend", filters, granularity),
+        lambda: query_pool.run_async(query_trend, filters, granularity, snapshot_source),
+    )
+
+async def get_ai_summary(spec):
+    """Return the AI chart aggregates for a filter spec, shared across sessions like snapshots."""
+    return await snapshot_cache.get_or_compute_async(
+        ("ai_summary", normalize_ai_spec(spec)),
+        lambda: query_pool.run_async(query_ai_summary, spec),
+    )
+
+# Warm start: the default view and the presets one click away from it are
+# computed at boot and persisted as Arrow IPC files tagged with the dataset
+# fingerprint and a hash of the query code, so a restart or another worker
+# loads them from disk instead of querying (WARM_START_DIR, empty disables).
+WARM_START_DIR = os.getenv("WARM_START_DIR", str(Path(__file__).resolve().parent.parent / "data" / "cache" / "warm_start"))
+QUERIES_TAG = hashlib.sha1(Path(__file__).with_name("queries.py").read_bytes()).hexdigest()[:12]
+
+def default_filters():
+    """Normalized filters of the sidebar defaults: every year, month and region, first three categories."""
+    return normalize_filters(year_choices, range(1, 13), categories[0:3], regions)
+
+DEFAULT_FILTERS = default_filters()
+
+def warm_presets():
+    """Cache key -> compute function for the default view and its most common variations."""
+    years, months, cats, regs = DEFAULT_FILTERS
+    filter_sets = [DEFAULT_FILTERS]
+    filter_sets += [(years, months, cats, tuple(r for r in regs if r != reg)) for reg in regs if len(regs) > 1]
+    filter_sets += [((y,), months, cats, regs) for y in years if len(years) > 1]
+
+    presets = {f: functools.partial(query_pool.run, query_dashboard_snapshot, f, snapshot_source) for f in filter_sets}
+    for granularity in ("day", "week", "quarter"):
+        presets[("trend", DEFAULT_FILTERS, granularity)] = functools.partial(
+            query_pool.run, query_trend, DEFAULT_FILTERS, granularity, snapshot_source)
+    presets[("ai_summary", normalize_ai_spec({}))] = functools.partial(query_pool.run, query_ai_summary, {})
+    return presets
+
+def warm_start():
+    """Load persisted presets, compute whichever are missing and persist them; returns (loaded, computed)."""
+    presets = warm_presets()
+    loaded = snapshot_cache.load(WARM_START_DIR, QUERIES_TAG) if WARM_START_DIR else 0
+    missing = [key for key in presets if key not in snapshot_cache]
+    for key in missing:
+        snapshot_cache.put(key, presets[key]())
+    if missing and WARM_START_DIR:
+        snapshot_cache.dump(WARM_START_DIR, keys=set(presets), tag=QUERIES_TAG)
+    return loaded, len(missing)
+
+warm_start()
+
+# Hot reload: a new data drop (DATA_PATH), or a rebuilt database or Arrow file,
+# is picked up without a restart (DATA_RELOAD_S seconds between checks, 0
+# disables). The new store is opened on the watcher thread while sessions keep
+# querying the old one, then swapped in on the event loop in one step, so the
+# pool, vocabularies and cache version always change together. Sessions see
+# the new generation on their next poll, re-query and refresh their sidebar
+# choices. The old store is released once the queries still running on it
+# return, so both are held only for the length of the swap.
+DATA_RELOAD_S = float(os.getenv("DATA_RELOAD_S", "5"))
+
+data_generation = 0
+event_loop = None  # the loop sessions run on, captured by the first session
+
+async def swap_store(store, info, fingerprint):
+    """Make a newly opened store current; runs on the event loop between session updates."""
+    global con, snapshot_source, setup_cursor, DEFAULT_FILTERS, data_generation
+    global year_choices, categories, regions, payment_methods, assistant_vocab, overall_revenue, overall_orders
+    con, snapshot_source, setup_cursor = store
+    year_choices, categories, regions, payment_methods, assistant_vocab, overall_revenue, overall_orders = info
+    DEFAULT_FILTERS = default_filters()
+    query_pool.swap(con, setup_cursor)
+    snapshot_cache.set_version(fingerprint)
+    data_generation += 1
+
+def reload_data(version):
+    """Open the data as it is now, swap it in and warm the presets; runs on the watcher thread.
+
+    `version` is the store_version() the watcher saw; its first entry is the
+    dataset fingerprint the result cache is keyed on.
+    """
+    store = open_store(DATA_PATH, DUCKDB_PATH, mode=DATA_STORE)
+    info = read_store_info(store[0])
+    asyncio.run_coroutine_threadsafe(swap_store(store, info, version[0]), event_loop).result()
+    warm_start()
+
+data_watcher = DatasetWatcher(lambda: store_version(DATA_PATH, DUCKDB_PATH), reload_data, DATA_RELOAD_S)
+
+def start_data_watcher():
+    """Capture the sessions' event loop and start the watcher; called by every session, acts once."""
+    global event_loop
+    if event_loop is None:
+        event_loop = asyncio.get_running_loop()
+        data_watcher.start()
 
 REGION_COUNTRY_MAPPING = {
     "Asia": ["China", "India", "Japan", "South Korea", "Vietnam", "Thailand", "Indonesia", "Malaysia", "Philippines", "Singapore", "Taiwan"],
@@ -49,12 +202,47 @@ REGION_COUNTRY_MAPPING = {
     "North America": ["United States", "Canada", "Mexico"]
 }
 
+# Country -> region rows for the choropleth, one per mapped country
+MAP_FRAME = {
+    "Country": [c for reg in regions if reg in REGION_COUNTRY_MAPPING for c in REGION_COUNTRY_MAPPING[reg]],
+    "Region": [reg for reg in regions if reg in REGION_COUNTRY_MAPPING for _ in REGION_COUNTRY_MAPPING[reg]],
+}
+
+@functools.cache
+def base_map_figure():
+    """Region choropleth with geometry resolved once per process; sessions copy it into a widget."""
+    fig = px.choropleth(
+        MAP_FRAME,
+        locations="Country",
+        locationmode="country names",
+        color="Region",
+        custom_data=["Region"],
+        template="plotly_white",
+        labels=LABEL_MAP,
+    )
+    fig.update_geos(showcountries=True, countrycolor="White", showocean=True, oceancolor="#E8F4F8", projection_type="equirectangular")
+    fig.update_layout(margin={"r":0,"t":0,"l":0,"b":0}, clickmode="event", showlegend=False, dragmode=False)
+    return fig
+
+# Sidebar and map changes closer together than this are combined into one
+# dashboard recomputation (FILTER_DEBOUNCE_MS)
+FILTER_DEBOUNCE_S = int(os.getenv("FILTER_DEBOUNCE_MS", "250")) / 1000
+
+# Points per trend series when the chart width is not known yet (TREND_MAX_POINTS)
+TREND_MAX_POINTS = int(os.getenv("TREND_MAX_POINTS", "800"))
+
+# Rows fetched per page of the AI Assistant table
+AI_PAGE_SIZE = 25
+AI_COLUMN_CHOICES = {c: c.replace("_", " ").title() for c in SALES_COLUMNS}
+
 LABEL_MAP = {
     "month_start": "Month",
+    "period_start": "Period",
     "product_category": "Category",
     "season": "Season",
     "payment_method": "Payment Method",
     "total_revenue": "Revenue ($)",
+    "avg_revenue": "Average Revenue ($)",
     "order_id": "Total Orders",
     "customer_region": "Region"
 }
@@ -73,176 +261,219 @@ def get_metric_info(metric):
 # =============================================================================
 # 2. User Interface (UI) Definition
 # =============================================================================
-app_ui = ui.page_navbar(
-    # --- TAB 1: DASHBOARD ---
-    ui.nav_panel(
-        "Dashboard",
-        ui.page_fillable(
-            ui.layout_sidebar(
-                ui.sidebar(
-                    ui.input_checkbox_group("input_year", "Years", choices=year_choices, selected=year_choices, inline=True),
-                    ui.input_selectize(
-                        "input_month", "Months", 
-                        choices={i: m for i, m in enumerate(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)},
-                        multiple=True, selected=list(range(1, 13))
+# Built per request, so sessions that start after a hot reload get the
+# sidebar choices of the data being served
+def app_ui(request):
+    return ui.page_navbar(
+        # --- TAB 1: DASHBOARD ---
+        ui.nav_panel(
+            "Dashboard",
+            ui.page_fillable(
+                ui.layout_sidebar(
+                    ui.sidebar(
+                        ui.input_checkbox_group("input_year", "Years", choices=year_choices, selected=year_choices, inline=True),
+                        ui.input_selectize(
+                            "input_month", "Months", 
+                            choices={i: m for i, m in enumerate(["Jan", "Feb", "Mar", "Apr", "May", "Jun", "Jul", "Aug", "Sep", "Oct", "Nov", "Dec"], 1)},
+                            multiple=True, selected=list(range(1, 13))
+                        ),
+                        ui.input_selectize("input_category", "Categories (Max 3)", choices=categories, selected=categories[0:3], multiple=True, options={"maxItems": 3}),
+                        ui.output_ui("aggregate_switch_ui"),                    
+                        ui.input_checkbox_group("input_region", "Regions", choices=regions, selected=regions, inline=False),
+                        ui.input_radio_buttons("input_metric", "Primary Metric:", choices={"total_revenue": "Revenue ($)", "order_id": "Total Orders"}, selected="total_revenue", inline=True),
+                        ui.input_switch("input_season", "Show Seasonality", value=True),
+                        # ui.input_action_button("apply_btn", "Apply Filters", class_="btn-success mt-2"),
+                        ui.input_action_button("reset_btn", "Reset All Filters", class_="btn-warning mt-2"),
+                        width=260,
                     ),
-                    ui.input_selectize("input_category", "Categories (Max 3)", choices=categories, selected=categories[0:3], multiple=True, options={"maxItems": 3}),
-                    ui.output_ui("aggregate_switch_ui"),                    
-                    ui.input_checkbox_group("input_region", "Regions", choices=regions, selected=regions, inline=False),
-                    ui.input_radio_buttons("input_metric", "Primary Metric:", choices={"total_revenue": "Revenue ($)", "order_id": "Total Orders"}, selected="total_revenue", inline=True),
-                    ui.input_switch("input_season", "Show Seasonality", value=True),
-                    # ui.input_action_button("apply_btn", "Apply Filters", class_="btn-success mt-2"),
-                    ui.input_action_button("reset_btn", "Reset All Filters", class_="btn-warning mt-2"),
-                    width=260,
-                ),
 
-                # Main Display Area
-                ui.div(
-                    # ROW 1 (3/5 Height Ratio)
+                    # Main Display Area
                     ui.div(
-                        ui.layout_columns(
+                        # ROW 1 (3/5 Height Ratio)
+                        ui.div(
                             ui.layout_columns(
-                                ui.card(ui.output_ui("valuebox_revenue"),class_="d-flex justify-content-center align-items-center bg-primary text-white p-2 m-0"),
-                                ui.card(ui.output_ui("valuebox_orders"), class_="d-flex justify-content-center align-items-center bg-info text-white p-2 m-0"),
-                                ui.card(ui.output_ui("trend_header"), output_widget("plot_trend")),
-                                col_widths=(6, 6, 12), row_heights=["min-content", "1fr"], gap="10px", height="100%"
+                                ui.layout_columns(
+                                    ui.card(ui.output_ui("valuebox_revenue"),class_="d-flex justify-content-center align-items-center bg-primary text-white p-2 m-0"),
+                                    ui.card(ui.output_ui("valuebox_orders"), class_="d-flex justify-content-center align-items-center bg-info text-white p-2 m-0"),
+                                    ui.card(
+                                        ui.output_ui("trend_header"),
+                                        ui.input_radio_buttons(
+                                            "input_granularity", None,
+                                            choices={"day": "Day", "week": "Week", "month": "Month", "quarter": "Quarter"},
+                                            selected="month", inline=True,
+                                        ),
+                                        output_widget("plot_trend"),
+                                    ),
+                                    col_widths=(6, 6, 12), row_heights=["min-content", "1fr"], gap="10px", height="100%"
+                                ),
+                                ui.card(ui.card_header("Regional Distribution (Click to filter)"), output_widget("plot_map")),
+                                col_widths=(5, 7), gap="10px", height="100%"
                             ),
-                            ui.card(ui.card_header("Regional Distribution (Click to filter)"), output_widget("plot_map")),
-                            col_widths=(5, 7), gap="10px", height="100%"
+                            style="flex: 3 1 0; min-height: 0;"
                         ),
-                        style="flex: 3 1 0; min-height: 0;"
-                    ),
                     
-                    # ROW 2 (2/5 Height Ratio)
-                    ui.div(
-                        ui.layout_columns(
-                            ui.div(
-                                ui.panel_conditional("input.input_season", ui.card(ui.output_ui("season_header"), output_widget("plot_season"), style="height: 100%; margin: 0;")),
-                                style="height: 100%;"
+                        # ROW 2 (2/5 Height Ratio)
+                        ui.div(
+                            ui.layout_columns(
+                                ui.div(
+                                    ui.panel_conditional("input.input_season", ui.card(ui.output_ui("season_header"), output_widget("plot_season"), style="height: 100%; margin: 0;")),
+                                    style="height: 100%;"
+                                ),
+                                ui.card(ui.output_ui("payment_header"), output_widget("payment_method_bar")),
+                                col_widths=(6, 6), gap="10px", height="100%"
                             ),
-                            ui.card(ui.output_ui("payment_header"), output_widget("payment_method_bar")),
-                            col_widths=(6, 6), gap="10px", height="100%"
+                            style="flex: 2 1 0; min-height: 0;"
                         ),
-                        style="flex: 2 1 0; min-height: 0;"
-                    ),
-                    # Unified Footer
-                    ui.tags.footer(
-                        ui.div(
-                            ui.div(ui.strong("Project: Amazon Sales Dashboard"), style="margin-bottom: 2px;"),
-                            ui.span("Authors: Hoi Hin Kwok, Yanxin Liang, Eduardo Sanchez"),
-                            ui.span(" | "),
-                            ui.tags.a("GitHub Repository", href="https://github.com/UBC-MDS/DSCI-532_2026_28_amazon-sales", target="_blank"),
-                            ui.span(" | "),
-                            ui.tags.a("Data Source: Kaggle", href="https://www.kaggle.com/datasets/aliiihussain/amazon-sales-dataset", target="_blank"),
-                            ui.div("Last Modified: March 2026", style="font-size: 0.9em; margin-top: 2px;"),
-                            style="text-align: center; color: #6c757d; font-size: 0.72em; padding: 5px; border-top: 1px solid #eee;"
+                        # Unified Footer
+                        ui.tags.footer(
+                            ui.div(
+                                ui.div(ui.strong("Project: Amazon Sales Dashboard"), style="margin-bottom: 2px;"),
+                                ui.span("Authors: Hoi Hin Kwok, Yanxin Liang, Eduardo Sanchez"),
+                                ui.span(" | "),
+                                ui.tags.a("GitHub Repository", href="https://github.com/UBC-MDS/DSCI-532_2026_28_amazon-sales", target="_blank"),
+                                ui.span(" | "),
+                                ui.tags.a("Data Source: Kaggle", href="https://www.kaggle.com/datasets/aliiihussain/amazon-sales-dataset", target="_blank"),
+                                ui.div("Last Modified: March 2026", style="font-size: 0.9em; margin-top: 2px;"),
+                                style="text-align: center; color: #6c757d; font-size: 0.72em; padding: 5px; border-top: 1px solid #eee;"
+                            ),
+                            style="flex: 0 0 auto;"
                         ),
-                        style="flex: 0 0 auto;"
+                        style="display: flex; flex-direction: column; height: calc(100vh - 80px); gap: 10px; overflow: hidden;"
                     ),
-                    style="display: flex; flex-direction: column; height: calc(100vh - 80px); gap: 10px; overflow: hidden;"
                 ),
-            ),
-        )
-    ),
+            )
+        ),
 
-# --- TAB 2: AI ASSISTANT ---
+    # --- TAB 2: AI ASSISTANT ---
    
 
-ui.nav_panel(
-    "AI Assistant",
-    ui.page_fluid(
-        ui.h3("Ask the Data", class_="mt-3"),
-        ui.layout_columns(
-            ui.div(
-                ui.card(
-                    ui.card_header("How to use the AI Assistant"),
-                    ui.tags.ul(
-                        ui.tags.li("Ask about categories, regions, years, and payment methods."),
-                        ui.tags.li("Supported filters include: product category, customer region, year, and payment method."),
-                        ui.tags.li("Example queries:"),
+    ui.nav_panel(
+        "AI Assistant",
+        ui.page_fluid(
+            ui.h3("Ask the Data", class_="mt-3"),
+            ui.layout_columns(
+                ui.div(
+                    ui.card(
+                        ui.card_header("How to use the AI Assistant"),
                         ui.tags.ul(
-                            ui.tags.li("electronics in North America in 2023"),
-                            ui.tags.li("beauty orders in Europe"),
-                            ui.tags.li("credit card purchases in 2022"),
-                            ui.tags.li("fashion in Asia paid with UPI"),
+                            ui.tags.li("Ask about categories, regions, years, and payment methods."),
+                            ui.tags.li("Supported filters include: product category, customer region, year, and payment method."),
+                            ui.tags.li("Example queries:"),
+                            ui.tags.ul(
+                                ui.tags.li("electronics in North America in 2023"),
+                                ui.tags.li("beauty orders in Europe"),
+                                ui.tags.li("credit card purchases in 2022"),
+                                ui.tags.li("fashion in Asia paid with UPI"),
+                            ),
                         ),
                     ),
-                ),
-                ui.br(),
-                ui.card(
-                    ui.card_header("Conversation"),
+                    ui.br(),
+                    ui.card(
+                        ui.card_header("Conversation"),
+                        ui.div(
+                            ui.output_ui("ai_chat_history"),
+                            id="ai-chat-container",
+                            style="height: 320px; overflow-y: auto; padding: 10px;",
+                        ),
+                    ),
+                    ui.br(),
+                    ui.input_text_area(
+                        "ai_query",
+                        "Message",
+                        placeholder="Ask about categories, regions, years, or payment methods...",
+                        rows=2,
+                    ),
                     ui.div(
-                        ui.output_ui("ai_chat_history"),
-                        id="ai-chat-container",
-                        style="height: 320px; overflow-y: auto; padding: 10px;",
+                        ui.input_action_button("run_ai_query", "Send", class_="btn-primary"),
+                        ui.download_button("download_ai_data", "Download CSV"),
+                        ui.download_button("download_ai_parquet", "Download Parquet"),
+                        style="display: flex; gap: 10px;",
                     ),
                 ),
-                ui.br(),
-                ui.input_text_area(
-                    "ai_query",
-                    "Message",
-                    placeholder="Ask about categories, regions, years, or payment methods...",
-                    rows=2,
-                ),
                 ui.div(
-                    ui.input_action_button("run_ai_query", "Send", class_="btn-primary"),
-                    ui.download_button("download_ai_data", "Download CSV"),
-                    style="display: flex; gap: 10px;",
+                    ui.output_text("ai_status"),
+                    ui.hr(),
+                    ui.h4("Filtered Dataframe"),
+                    # Sorting, filtering and paging run in DuckDB; only the visible page is sent
+                    ui.layout_columns(
+                        ui.input_select("ai_sort", "Sort by", AI_COLUMN_CHOICES, selected="order_id"),
+                        ui.input_select("ai_sort_dir", "Order", {"asc": "Ascending", "desc": "Descending"}),
+                        ui.input_select("ai_filter_column", "Filter column", AI_COLUMN_CHOICES, selected="product_category"),
+                        ui.input_text("ai_filter_text", "Contains"),
+                        col_widths=(3, 3, 3, 3),
+                    ),
+                    ui.output_data_frame("ai_filtered_table"),
+                    ui.div(
+                        ui.input_action_button("ai_prev", "‹ Prev", class_="btn-sm"),
+                        ui.output_text("ai_page_info", inline=True),
+                        ui.input_action_button("ai_next", "Next ›", class_="btn-sm"),
+                        style="display: flex; gap: 10px; align-items: center;",
+                    ),
+                    ui.hr(),
+                    ui.layout_columns(
+                        ui.card(ui.card_header("Revenue Trend by Category"), output_widget("ai_plot_trend")),
+                        ui.card(ui.card_header("Average Revenue by Season"), output_widget("ai_plot_season")),
+                        col_widths=(6, 6),
+                    ),
                 ),
+                col_widths=(2, 10),
+                gap="20px",
             ),
-            ui.div(
-                ui.output_text("ai_status"),
-                ui.hr(),
-                ui.h4("Filtered Dataframe"),
-                ui.output_data_frame("ai_filtered_table"),
-                ui.hr(),
-                ui.layout_columns(
-                    ui.card(ui.card_header("Revenue Trend by Category"), output_widget("ai_plot_trend")),
-                    ui.card(ui.card_header("Average Revenue by Season"), output_widget("ai_plot_season")),
-                    col_widths=(6, 6),
-                ),
+            ui.tags.script("""
+                document.addEventListener("DOMContentLoaded", () => {
+                const chatBox = document.getElementById("ai-chat-container");
+                if (!chatBox) return;
+
+                const observer = new MutationObserver(() => {
+                    chatBox.scrollTop = chatBox.scrollHeight;
+                });
+
+                observer.observe(chatBox, {
+                    childList: true,
+                    subtree: true
+                });
+                });
+                """
             ),
-            col_widths=(2, 10),
-            gap="20px",
-        ),
-        ui.tags.script("""
-            document.addEventListener("DOMContentLoaded", () => {
-            const chatBox = document.getElementById("ai-chat-container");
-            if (!chatBox) return;
-
-            const observer = new MutationObserver(() => {
-                chatBox.scrollTop = chatBox.scrollHeight;
-            });
-
-            observer.observe(chatBox, {
-                childList: true,
-                subtree: true
-            });
-            });
-            """
         ),
     ),
-),
 
-    title="Amazon Sales Dashboard",
-    fillable=True,
-)
+        title="Amazon Sales Dashboard",
+        fillable=True,
+    )
 
 # =============================================================================
 # 3. Server Logic
 # =============================================================================
 def server(input, output, session):
+    start_data_watcher()
 
     # --- Reactive Value Stores ---
     clicked_region_state = reactive.Value(None)
-    ai_df_store = reactive.Value(df.copy())
+    ai_filter_store = reactive.Value({})  # AI filter spec: {} is the full dataset, None matches nothing
+    ai_page = reactive.Value(0)
     ai_status_store = reactive.Value("Waiting for a query.")
     ai_chat_store = reactive.Value([])
 
+    # Bumped when the watcher swaps in reloaded data (polling a module-level
+    # counter is free; with reloads disabled it never changes)
+    @reactive.poll(lambda: data_generation, DATA_RELOAD_S or 3600)
+    def data_version():
+        return data_generation
+
+    # Keep each session's selection where the values still exist in the new data
+    @reactive.effect
+    @reactive.event(data_version, ignore_init=True)
+    def _refresh_choices():
+        ui.update_checkbox_group("input_year", choices=year_choices, selected=[y for y in input.input_year() or () if y in year_choices])
+        ui.update_selectize("input_category", choices=categories, selected=[c for c in input.input_category() or () if c in categories])
+        ui.update_checkbox_group("input_region", choices=regions, selected=[r for r in input.input_region() or () if r in regions])
+
     # --- DASHBOARD LOGIC ---
 
     @output
     @render.ui
+    @instrument.traced("render")
     def aggregate_switch_ui():
         categories = input.input_category() or []
         
@@ -272,77 +503,43 @@ def server(input, output, session):
         ui.update_selectize("input_category", selected=categories[0:3])
         ui.update_checkbox_group("input_region", selected=regions)
         ui.update_radio_buttons("input_metric", selected="total_revenue")
+        ui.update_radio_buttons("input_granularity", selected="month")
         ui.update_switch("input_aggregate", value=False)
         ui.update_switch("input_season", value=True)
     
     @reactive.calc
+    @instrument.traced("calc")
     def m_info():
         return get_metric_info(input.input_metric())
     
+    # Clicking through checkboxes or map regions only recomputes the dashboard
+    # for the state the user settles on, not for every intermediate selection.
+    @debounce(FILTER_DEBOUNCE_S)
+    def dashboard_filters():
+        return normalize_filters(input.input_year(), input.input_month(), input.input_category(), input.input_region())
+
     @reactive.calc
-    def dashboard_map_base_df():
-        years = [int(y) for y in (input.input_year() or [])]
-        months = [int(m) for m in (input.input_month() or [])]
-        cats = input.input_category() or []
-
-        if not (years and months and cats):
-            return pd.DataFrame(columns=[
-                "order_id", "order_date", "product_id", "product_category", "price",
-                "discount_percent", "quantity_sold", "customer_region",
-                "payment_method", "rating", "review_count", "discounted_price",
-                "total_revenue"
-            ])
-
-        years_sql = ",".join(map(str, years))
-        months_sql = ",".join(map(str, months))
-        cats_sql = ",".join(f"'{c}'" for c in cats)
-
-        query = f"""
-            SELECT *
-            FROM sales
-            WHERE year(order_date) IN ({years_sql})
-            AND month(order_date) IN ({months_sql})
-            AND product_category IN ({cats_sql})
-        """
-
-        return con.execute(query).df()
+    @instrument.traced("calc")
+    async def dashboard_snapshot():
+        # One DuckDB scan (or a shared cache hit) feeds every panel. The map can
+        # share the region filter because unselected regions are drawn at zero
+        # anyway. Results carry both metrics, so input_metric never re-queries.
+        data_version()
+        return await get_dashboard_snapshot(dashboard_filters())
 
     @reactive.calc
-    def dashboard_filtered_df():
-        years = [int(y) for y in (input.input_year() or [])]
-        months = [int(m) for m in (input.input_month() or [])]
-        cats = input.input_category() or []
-        regs = input.input_region() or []
-
-        if not (years and months and cats and regs):
-            return pd.DataFrame(columns=[
-                "order_id", "order_date", "product_id", "product_category", "price",
-                "discount_percent", "quantity_sold", "customer_region",
-                "payment_method", "rating", "review_count", "discounted_price",
-                "total_revenue"
-            ])
-
-        years_sql = ",".join(map(str, years))
-        months_sql = ",".join(map(str, months))
-        cats_sql = ",".join(f"'{c}'" for c in cats)
-        regs_sql = ",".join(f"'{r}'" for r in regs)
-
-        query = f"""
-            SELECT *
-            FROM sales
-            WHERE year(order_date) IN ({years_sql})
-            AND month(order_date) IN ({months_sql})
-            AND product_category IN ({cats_sql})
-            AND customer_region IN ({regs_sql})
-        """
-
-        return con.execute(query).df()
+    @instrument.traced("calc")
+    async def dashboard_totals():
+        totals = snapshot_panel(await dashboard_snapshot(), "totals").fill_null(0)
+        if totals.is_empty(): return 0.0, 0
+        return float(totals["total_revenue"][0]), int(totals["order_id"][0])
 
     @output
     @render.ui
-    def valuebox_revenue():
-        total_revenue = df["total_revenue"].sum()
-        filtered_revenue = dashboard_filtered_df()["total_revenue"].sum()
+    @instrument.traced("render")
+    async def valuebox_revenue():
+        total_revenue = overall_revenue
+        filtered_revenue = (await dashboard_totals())[0]
 
         percent = (filtered_revenue / total_revenue) * 100 if total_revenue > 0 else 0
 
@@ -356,9 +553,10 @@ def server(input, output, session):
 
     @output
     @render.ui
-    def valuebox_orders():
-        total_orders = df["order_id"].nunique()
-        filtered_orders = dashboard_filtered_df()["order_id"].nunique()
+    @instrument.traced("render")
+    async def valuebox_orders():
+        total_orders = overall_orders
+        filtered_orders = (await dashboard_totals())[1]
 
         percent = (filtered_orders / total_orders) * 100 if total_orders > 0 else 0
 
@@ -370,92 +568,52 @@ def server(input, output, session):
             class_="d-flex flex-column justify-content-center align-items-center w-100",
         )
 
+    @reactive.calc
+    @instrument.traced("calc")
+    async def dashboard_trend():
+        # Monthly buckets are already in the snapshot; other granularities are
+        # bucketed by date_trunc in DuckDB and cached like snapshots.
+        granularity = input.input_granularity()
+        data_version()
+        if granularity == "month":
+            return (await dashboard_snapshot()).rename({"month_start": "period_start"})
+        return await get_trend(dashboard_filters(), granularity)
+
     @output 
     @render_widget
-    def plot_trend():
-        d = dashboard_filtered_df()
-        if d.empty: return px.line(title="No data").update_layout(template="plotly_white")
+    @instrument.traced("render")
+    async def plot_trend():
+        trend = await dashboard_trend()
         info = m_info()
-        d["month_start"] = d["order_date"].dt.to_period("M").dt.to_timestamp()
-
-        grouped = d.groupby(["month_start", "product_category"], as_index=False).agg({info["id"]: info["agg_func"]})
-        fig = px.line(grouped, x="month_start", y=info["id"], color="product_category", markers=True, template="plotly_white", labels=LABEL_MAP)
+        # At most one point per horizontal pixel per series; fine-grained series
+        # are reduced with LTTB so peaks survive but the browser gets less data.
+        with reactive.isolate():
+            max_points = int(session.clientdata.output_width("plot_trend") or TREND_MAX_POINTS)
+        grouped = downsample(trend_panel(trend, "trend"), "period_start", info["id"], max_points, by="product_category")
+        if grouped.is_empty(): return px.line(title="No data").update_layout(template="plotly_white")
+        markers = input.input_granularity() in ("month", "quarter")
+        fig = px.line(grouped, x="period_start", y=info["id"], color="product_category", markers=markers, template="plotly_white", labels=LABEL_MAP)
         
-        categories = input.input_category() or []
+        categories = dashboard_filters()[2]
         show_agg = (
             len(categories) > 1
             and "input_aggregate" in input
             and input.input_aggregate()
         )
         if show_agg:
-            agg = d.groupby("month_start", as_index=False).agg({info["id"]: info["agg_func"]})
-            fig.add_scatter(x=agg["month_start"], y=agg[info["id"]], mode="lines+markers", name="Aggregate", line=dict(color="black", dash="dash"))
+            agg = downsample(trend_panel(trend, "trend_aggregate"), "period_start", info["id"], max_points)
+            fig.add_scatter(x=agg["period_start"], y=agg[info["id"]], mode="lines+markers" if markers else "lines", name="Aggregate", line=dict(color="black", dash="dash"))
         
         fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), yaxis_title=info["label"], yaxis_tickformat=info["exact_format"], legend_title_text="Category")
         return fig
 
+    # The map widget is created once per session; filter and metric changes
+    # only patch each region trace's hover text and opacity in place.
     @output 
     @render_widget 
+    @instrument.traced("render")
     def plot_map():
-        # Map ignores region sidebar for background view calculation
-        d_base = dashboard_map_base_df()
-        
-        info = m_info()
-        selected_regs = list(input.input_region() or [])
-        
-        # Aggregate the background data
-        if d_base.empty:
-            summary_dict = {}
-        else:
-            summary = d_base.groupby("customer_region", as_index=False).agg({info["id"]: info["agg_func"]})
-            # Convert to dictionary for easy lookup
-            summary_dict = dict(zip(summary["customer_region"], summary[info["id"]]))
-
-        map_list = []
-        
-        # Iterate over ALL globally defined regions so map shapes never disappear
-        for reg in regions:
-            # If region is selected, use actual data. If not, force to 0.
-            if reg in selected_regs:
-                val = summary_dict.get(reg, 0) # Get value, default to 0 if no sales
-            else:
-                val = 0
-                
-            # Format the tooltip value
-            fmt_val = f"${val:,.0f}" if info["id"] == "total_revenue" else f"{val:,.0f}"
-            
-            # Map region to actual countries for the Choropleth
-            if reg in REGION_COUNTRY_MAPPING:
-                for country in REGION_COUNTRY_MAPPING[reg]:
-                    map_list.append({
-                        "Country": country, 
-                        "Region": reg, 
-                        "FormattedValue": fmt_val, 
-                        info["id"]: val
-                    })
-                    
-        if not map_list: 
-            return px.choropleth(scope="world").update_layout(template="plotly_white")
-            
-        fig = px.choropleth(
-            pd.DataFrame(map_list), 
-            locations="Country", 
-            locationmode="country names", 
-            color="Region", 
-            custom_data=["Region", "FormattedValue"], 
-            template="plotly_white", 
-            labels=LABEL_MAP
-        )
-        
-        fig.update_traces(hovertemplate="<b>%{customdata[0]}</b><br>" + info["label"] + ": %{customdata[1]}<extra></extra>")
-        fig.update_geos(showcountries=True, countrycolor="White", showocean=True, oceancolor="#E8F4F8", projection_type="equirectangular")
-        fig.update_layout(margin={"r":0,"t":0,"l":0,"b":0}, clickmode="event", showlegend=False, dragmode=False)
-        
-        # Dim unselected regions
-        for trace in fig.data: 
-            trace.marker.opacity = 1.0 if trace.name in selected_regs else 0.2
-            
-        fw = go.FigureWidget(fig)
+        fw = go.FigureWidget(base_map_figure())
         
         def handle_click(trace, points, state):
             if points.point_inds: 
@@ -466,6 +624,35 @@ def server(input, output, session):
             
         return fw
 
+    @reactive.effect(priority=-1)
+    @instrument.traced("effect")
+    async def _update_map():
+        # Every region is drawn; only selected regions carry values from the snapshot
+        summary = snapshot_panel(await dashboard_snapshot(), "region")
+        info = m_info()
+        selected_regs = set(dashboard_filters()[3])
+        fw = plot_map.widget
+        
+        summary_dict = dict(zip(summary["customer_region"], summary[info["id"]]))
+        hovertemplate = "<b>%{customdata[0]}</b><br>" + info["label"] + ": %{customdata[1]}<extra></extra>"
+
+        with fw.batch_update():
+            for trace in fw.data:
+                reg = trace.name
+                # If region is selected, use actual data. If not, force to 0.
+                val = summary_dict.get(reg, 0) if reg in selected_regs else 0
+                fmt_val = f"${val:,.0f}" if info["id"] == "total_revenue" else f"{val:,.0f}"
+                opacity = 1.0 if reg in selected_regs else 0.2
+
+                # Only assign what changed, so the browser receives the smallest diff
+                customdata = [[reg, fmt_val]] * len(trace.locations)
+                if trace.customdata is None or [list(row) for row in trace.customdata] != customdata:
+                    trace.customdata = customdata
+                if trace.hovertemplate != hovertemplate:
+                    trace.hovertemplate = hovertemplate
+                if trace.marker.opacity != opacity:
+                    trace.marker.opacity = opacity
+
     @reactive.effect
     def _sync_map_click():
         reg = clicked_region_state()
@@ -478,25 +665,24 @@ def server(input, output, session):
 
     @output 
     @render_widget
-    def plot_season():
-        d = dashboard_filtered_df()
-        if d.empty: return px.bar(title="No data").update_layout(template="plotly_white")
-        info, mapping = m_info(), {12: "Winter", 1: "Winter", 2: "Winter", 3: "Spring", 4: "Spring", 5: "Spring", 6: "Summer", 7: "Summer", 8: "Summer", 9: "Fall", 10: "Fall", 11: "Fall"}
-        d["season"] = d["order_date"].dt.month.map(mapping)
-        grouped = d.groupby(["season", "product_category"], as_index=False).agg({info["id"]: info["agg_func"]})
-        grouped["season"] = pd.Categorical(grouped["season"], ["Spring", "Summer", "Fall", "Winter"], ordered=True)
-        fig = px.bar(grouped.sort_values("season"), x="season", y=info["id"], color="product_category",barmode="group", template="plotly_white", labels=LABEL_MAP)
+    @instrument.traced("render")
+    async def plot_season():
+        grouped = snapshot_panel(await dashboard_snapshot(), "season")
+        if grouped.is_empty(): return px.bar(title="No data").update_layout(template="plotly_white")
+        info = m_info()
+        fig = px.bar(grouped, x="season", y=info["id"], color="product_category",barmode="group", template="plotly_white", labels=LABEL_MAP)
         fig.update_yaxes(rangemode="normal") 
         fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), yaxis_title=info["label"], yaxis_tickformat=info["exact_format"])
         return fig
 
     @output 
     @render_widget
-    def payment_method_bar():
-        d = dashboard_filtered_df()
-        if d.empty: return px.bar(title="No data").update_layout(template="plotly_white")
+    @instrument.traced("render")
+    async def payment_method_bar():
+        d = snapshot_panel(await dashboard_snapshot(), "payment")
+        if d.is_empty(): return px.bar(title="No data").update_layout(template="plotly_white")
         info = m_info()
-        grouped = d.groupby("payment_method", as_index=False).agg({info["id"]: info["agg_func"]}).sort_values(info["id"], ascending=False)
+        grouped = d.sort(info["id"], descending=True)
         fig = px.bar(grouped, x="payment_method", y=info["id"], color="payment_method", template="plotly_white", labels=LABEL_MAP)
         fig.update_yaxes(rangemode="normal")
         fig.update_layout(margin=dict(l=10, r=10, t=10, b=10), showlegend=False, yaxis_title=info["label"], yaxis_tickformat=info["exact_format"])
@@ -504,118 +690,58 @@ def server(input, output, session):
 
     # --- AI ASSISTANT LOGIC (Full Integration) ---
 
-    def parse_query_github_models(query: str):
-        token = os.getenv("GITHUB_TOKEN")
-
-        if not token:
-            raise ValueError("GITHUB_TOKEN is not set.")
-
-        url = "https://models.inference.ai.azure.com/chat/completions"
-
-        system_prompt = """
-        You convert user queries into dataset filters.
-
-        Return valid JSON only with exactly this schema:
-        {
-        "categories": [],
-        "regions": [],
-        "years": [],
-        "payment_methods": []
-        }
-
-        Rules:
-        - categories must come only from the dataset categories
-        - regions must come only from the dataset regions
-        - years must be integers
-        - payment_methods must come only from the dataset payment methods
-        - if something is not mentioned, return an empty list
-        - do not include explanations
-        - do not include markdown
-        """
-
-        payment_methods = sorted(df["payment_method"].dropna().unique().tolist())
-
-        user_prompt = f"""
-        Dataset categories: {categories}
-        Dataset regions: {regions}
-        Dataset payment methods: {payment_methods}
-        Valid years: {list(range(min_year, max_year + 1))}
-
-        User query: {query}
-        """
-
-        payload = {
-            "model": "gpt-4o-mini",
-            "messages": [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_prompt}
-            ],
-            "temperature": 0,
-            "max_tokens": 200
-        }
-
-        headers = {
-            "Content-Type": "application/json",
-            "Authorization": f"Bearer {token}"
-        }
-
-        response = requests.post(url, headers=headers, json=payload, timeout=30)
-        response.raise_for_status()
-
-        result = response.json()
-        content = result["choices"][0]["message"]["content"].strip()
-
-        try:
-            filters = json.loads(content)
-        except json.JSONDecodeError as e:
-            raise ValueError(f"Model returned invalid JSON: {content}") from e
-
-        return {
-            "categories": filters.get("categories", []),
-            "regions": filters.get("regions", []),
-            "years": filters.get("years", []),
-            "payment_methods": filters.get("payment_methods", []),
-        }
+    # Queries are answered from the memo or the local matcher when possible; the
+    # LLM fallback runs as an extended task so the session stays responsive while
+    # it is in flight, and a newer query cancels the one still running.
+    @reactive.extended_task
+    async def ai_parse_task(query):
+        filters, _source = await resolve_query(query, assistant_vocab, query_memo)
+        return filters
 
     @reactive.effect
     @reactive.event(input.run_ai_query)
     def _run_ai_logic():
         query = input.ai_query().strip()
 
+        if ai_parse_task.status() == "running":
+            ai_parse_task.cancel()
+            ai_chat_store.set(ai_chat_store() + [{"role": "assistant", "text": "Cancelled in favour of your newer question."}])
+
         if not query:
-            ai_df_store.set(df.copy())
+            ai_filter_store.set({})
             ai_status_store.set("Showing full dataset.")
             ui.update_text_area("ai_query", value="")
             return
 
         history = list(ai_chat_store())
         history.append({"role": "user", "text": query})
+        ai_chat_store.set(history)
+        ai_status_store.set("Thinking…")
+        ui.update_text_area("ai_query", value="")
+        ai_parse_task.invoke(query)
+
+    # Only the parsed filter spec is stored per session; the table, counts,
+    # charts and downloads query DuckDB from it on demand.
+    @reactive.effect
+    @instrument.traced("effect")
+    async def _apply_ai_result():
+        status = ai_parse_task.status()
+        if status not in ("success", "error"):
+            return
+
+        with reactive.isolate():
+            history = list(ai_chat_store())
 
         try:
-            filters = parse_query_github_models(query)
+            filters = ai_parse_task.result()
         except Exception as e:
-            ai_df_store.set(df.iloc[0:0].copy())
+            ai_filter_store.set(None)
             ai_status_store.set(f"LLM error: {str(e)}")
             history.append({"role": "assistant", "text": f"I could not parse your query because of an LLM error: {str(e)}"})
             ai_chat_store.set(history)
-            ui.update_text_area("ai_query", value="")
             return
 
-        d_ai = df.copy()
-
-        if filters["years"]:
-            d_ai = d_ai[d_ai["order_date"].dt.year.isin(filters["years"])]
-
-        if filters["categories"]:
-            d_ai = d_ai[d_ai["product_category"].isin(filters["categories"])]
-
-        if filters["regions"]:
-            d_ai = d_ai[d_ai["customer_region"].isin(filters["regions"])]
-
-        if filters["payment_methods"]:
-            d_ai = d_ai[d_ai["payment_method"].isin(filters["payment_methods"])]
-
-        ai_df_store.set(d_ai)
+        ai_filter_store.set(filters)
 
         detected_parts = []
         if filters["categories"]:
@@ -634,29 +760,35 @@ def server(input, output, session):
                 "text": "I could not identify supported filters in your query. Try mentioning a category, region, year, or payment method."
             })
             ai_chat_store.set(history)
-            ui.update_text_area("ai_query", value="")
             return
 
-        if d_ai.empty:
+        matches = ai_summary_panel(await get_ai_summary(filters), "trend")["row_count"].sum()
+
+        if matches == 0:
             ai_status_store.set("No matching records found.")
             history.append({
                 "role": "assistant",
                 "text": f"I interpreted your query using {', '.join(detected_parts)}, but no matching records were found."
             })
             ai_chat_store.set(history)
-            ui.update_text_area("ai_query", value="")
             return
 
-        ai_status_store.set(f"Found {len(d_ai):,} matches.")
+        ai_status_store.set(f"Found {matches:,} matches.")
         history.append({
             "role": "assistant",
-            "text": f"I interpreted your query using {', '.join(detected_parts)} and found {len(d_ai):,} matching rows."
+            "text": f"I interpreted your query using {', '.join(detected_parts)} and found {matches:,} matching rows."
         })
         ai_chat_store.set(history)
-        ui.update_text_area("ai_query", value="")
+
+    @reactive.calc
+    @instrument.traced("calc")
+    async def ai_summary():
+        data_version()
+        return await get_ai_summary(ai_filter_store())
 
     @output
     @render.ui
+    @instrument.traced("render")
     def ai_chat_history():
         history = ai_chat_store()
 
@@ -690,32 +822,82 @@ def server(input, output, session):
 
     @output 
     @render.text
+    @instrument.traced("render")
     def ai_status(): return ai_status_store()
 
+    @reactive.calc
+    @instrument.traced("calc")
+    def ai_table_query():
+        column_filter = (input.ai_filter_column(), input.ai_filter_text().strip())
+        data_version()
+        return ai_filter_store(), input.ai_sort(), input.ai_sort_dir() == "desc", column_filter
+
+    @reactive.effect
+    def _reset_ai_page():
+        ai_table_query()
+        ai_page.set(0)
+
+    @reactive.calc
+    @instrument.traced("calc")
+    async def ai_table_count():
+        spec, _sort, _descending, column_filter = ai_table_query()
+        return await query_pool.run_async(query_ai_count, spec, column_filter)
+
+    @reactive.effect
+    @reactive.event(input.ai_prev)
+    def _ai_prev_page():
+        ai_page.set(max(ai_page() - 1, 0))
+
+    @reactive.effect
+    @reactive.event(input.ai_next)
+    async def _ai_next_page():
+        last_page = max(await ai_table_count() - 1, 0) // AI_PAGE_SIZE
+        ai_page.set(min(ai_page() + 1, last_page))
+
     @output 
     @render.data_frame
-    def ai_filtered_table(): return render.DataGrid(ai_df_store(), filters=True)
+    @instrument.traced("render")
+    async def ai_filtered_table():
+        spec, sort, descending, column_filter = ai_table_query()
+        offset = ai_page() * AI_PAGE_SIZE
+        page = await query_pool.run_async(query_ai_page, spec, sort, descending, column_filter, AI_PAGE_SIZE, offset)
+        return render.DataGrid(page)
 
+    @output
+    @render.text
+    @instrument.traced("render")
+    async def ai_page_info():
+        total = await ai_table_count()
+        if total == 0: return "No rows"
+        start = ai_page() * AI_PAGE_SIZE
+        return f"Rows {start + 1:,}–{min(start + AI_PAGE_SIZE, total):,} of {total:,}"
+
+    # Exports rerun the AI filter in DuckDB and stream it batch by batch. Each
+    # download gets its own cursor so concurrent downloads never share a result,
+    # and every batch is fetched and encoded on the query pool, off the event loop.
     @render.download(filename="ai_export.csv")
-    def download_ai_data(): yield ai_df_store().to_csv(index=False)
+    async def download_ai_data():
+        export = lambda cur, spec: stream_csv(query_ai_batches(cur, spec))
+        async for chunk in query_pool.stream_async(export, ai_filter_store()):
+            yield chunk
+
+    @render.download(filename="ai_export.parquet")
+    async def download_ai_parquet():
+        export = lambda cur, spec: stream_parquet(query_ai_batches(cur, spec))
+        async for chunk in query_pool.stream_async(export, ai_filter_store()):
+            yield chunk
 
     @output 
     @render_widget
-    def ai_plot_trend():
-        d = ai_df_store()
+    @instrument.traced("render")
+    async def ai_plot_trend():
+        grouped = ai_summary_panel(await ai_summary(), "trend")
         
-        if d.empty:
+        if grouped.is_empty():
             fig = px.line(title="No data available")
             fig.update_layout(template="plotly_white")
             return fig
 
-        d["month_start"] = d["order_date"].dt.to_period("M").dt.to_timestamp()
-
-        grouped = (
-            d.groupby(["month_start", "product_category"], as_index=False)["total_revenue"]
-            .sum()
-        )
-
         fig = px.line(
             grouped,
             x="month_start",
@@ -737,37 +919,18 @@ def server(input, output, session):
 
     @output 
     @render_widget
-    def ai_plot_season():
-        d = ai_df_store()
-        if d.empty:
+    @instrument.traced("render")
+    async def ai_plot_season():
+        grouped = ai_summary_panel(await ai_summary(), "season")
+        if grouped.is_empty():
             fig = px.bar(title="No data available")
             fig.update_layout(template="plotly_white")
             return fig
 
-        season_map = {
-            12: "Winter", 1: "Winter", 2: "Winter",
-            3: "Spring", 4: "Spring", 5: "Spring",
-            6: "Summer", 7: "Summer", 8: "Summer",
-            9: "Fall", 10: "Fall", 11: "Fall"
-        }
-
-        d["season"] = d["order_date"].dt.month.map(season_map)
-
-        grouped = (
-            d.groupby(["season", "product_category"], as_index=False)["total_revenue"]
-            .mean()
-        )
-
-        grouped["season"] = pd.Categorical(
-            grouped["season"],
-            categories=["Spring", "Summer", "Fall", "Winter"],
-            ordered=True
-        )
-
         fig = px.bar(
-            grouped.sort_values("season"),
+            grouped,
             x="season",
-            y="total_revenue",
+            y="avg_revenue",
             color="product_category",
             barmode="group",
             template="plotly_white",
@@ -786,12 +949,16 @@ def server(input, output, session):
     # Titles
     @output 
     @render.ui
+    @instrument.traced("render")
     def trend_header(): return ui.card_header(f"{m_info()['short']} Trends")
     @output 
     @render.ui
+    @instrument.traced("render")
     def season_header(): return ui.card_header(f"Total {m_info()['short']} by Season")
     @output 
     @render.ui
+    @instrument.traced("render")
     def payment_header(): return ui.card_header(f"{m_info()['short']} by Payment Method")
 
-app = App(app_ui, server)
\ No newline at end of file
+# With INSTRUMENT on, Prometheus metrics are served at /metrics next to the app
+app = instrument.with_metrics_endpoint(App(app_ui, server))
\ No newline at end of file
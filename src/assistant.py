@@ -0,0 +1,280 @@
+import asyncio
+import difflib
+import hashlib
+import json
+import os
+import re
+import threading
+import weakref
+from collections import OrderedDict
+
+import httpx
+
+import instrument
+from cache import write_atomic
+
+# =============================================================================
+# AI Assistant: natural language -> dataset filters
+# =============================================================================
+# resolve_query() tries, in order: the persistent memo of earlier answers, a
+# local matcher against the dataset vocabularies, and only then the LLM. The
+# LLM call is async and goes through a pooled httpx client, so a slow
+# completion never blocks the Shiny worker. GITHUB_MODELS_URL can point the
+# assistant at a local stub server (see tests/llm_stub.py) for offline runs.
+
+DEFAULT_MODELS_URL = "https://models.inference.ai.azure.com/chat/completions"
+LLM_TIMEOUT = float(os.getenv("LLM_TIMEOUT", "30"))
+
+SYSTEM_PROMPT = """
+You convert user queries into dataset filters.
+
+Return valid JSON only with exactly this schema:
+{
+"categories": [],
+"regions": [],
+"years": [],
+"payment_methods": []
+}
+
+Rules:
+- categories must come only from the dataset categories
+- regions must come only from the dataset regions
+- years must be integers
+- payment_methods must come only from the dataset payment methods
+- if something is not mentioned, return an empty list
+- do not include explanations
+- do not include markdown
+"""
+
+# httpx clients are bound to the event loop they were created on, so keep one
+# pooled client per running loop (in the app there is exactly one).
+_clients = weakref.WeakKeyDictionary()
+
+
+def get_http_client():
+    """Shared keep-alive HTTP client for the current event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = httpx.AsyncClient(
+            timeout=LLM_TIMEOUT,
+            limits=httpx.Limits(max_connections=20, max_keepalive_connections=10),
+        )
+        _clients[loop] = client
+    return client
+
+
+@instrument.traced("llm")
+async def parse_query_github_models(query: str, vocab, client=None):
+    """Ask GitHub Models to turn `query` into filters drawn from `vocab`.
+
+    `vocab` holds the valid "categories", "regions", "payment_methods" and "years".
+    """
+    token = os.getenv("GITHUB_TOKEN")
+
+    if not token:
+        raise ValueError("GITHUB_TOKEN is not set.")
+
+    user_prompt = f"""
+    Dataset categories: {vocab["categories"]}
+    Dataset regions: {vocab["regions"]}
+    Dataset payment methods: {vocab["payment_methods"]}
+    Valid years: {vocab["years"]}
+
+    User query: {query}
+    """
+
+    payload = {
+        "model": "gpt-4o-mini",
+        "messages": [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": user_prompt}
+        ],
+        "temperature": 0,
+        "max_tokens": 200
+    }
+
+    headers = {
+        "Content-Type": "application/json",
+        "Authorization": f"Bearer {token}"
+    }
+
+    url = os.getenv("GITHUB_MODELS_URL", DEFAULT_MODELS_URL)
+    response = await (client or get_http_client()).post(url, headers=headers, json=payload)
+    response.raise_for_status()
+
+    result = response.json()
+    content = result["choices"][0]["message"]["content"].strip()
+
+    try:
+        filters = json.loads(content)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"Model returned invalid JSON: {content}") from e
+    if not isinstance(filters, dict):
+        raise ValueError(f"Model returned invalid filters: {content}")
+
+    return {key: _coerce_values(filters.get(key), key == "years") for key in ("categories", "regions", "years", "payment_methods")}
+
+
+def _coerce_values(values, as_int=False):
+    """One filter from the model's JSON as a list of str (or int), dropping values that are neither."""
+    coerced = []
+    for value in values if isinstance(values, list) else [values]:
+        if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+            continue
+        if not as_int:
+            coerced.append(str(value))
+            continue
+        try:
+            coerced.append(int(value))
+        except ValueError:
+            pass
+    return coerced
+
+
+# --- Local fast path ---
+
+# Words that carry no filter meaning in typical assistant questions
+STOPWORDS = {
+    "a", "all", "and", "any", "at", "bought", "by", "customers", "data", "during", "for", "from",
+    "give", "how", "i", "in", "is", "list", "made", "many", "me", "much", "of", "on", "or", "order",
+    "orders", "paid", "pay", "payment", "payments", "purchase", "purchased", "purchases", "region",
+    "revenue", "sale", "sales", "show", "sold", "the", "to", "using", "via", "want", "what", "with",
+    "year", "years",
+}
+FUZZY_CUTOFF = 0.85
+
+
+def _tokens(text):
+    return re.findall(r"[a-z0-9&]+", text.lower())
+
+
+def _match_phrase(tokens, used, phrase):
+    """Positions where `phrase` occurs in tokens (exactly or fuzzily), or None."""
+    target = _tokens(phrase)
+    n = len(target)
+    for i in range(len(tokens) - n + 1):
+        span = range(i, i + n)
+        if any(j in used for j in span):
+            continue
+        window = tokens[i:i + n]
+        if window == target or difflib.SequenceMatcher(None, " ".join(window), " ".join(target)).ratio() >= FUZZY_CUTOFF:
+            return set(span)
+    return None
+
+
+def parse_query_local(query, vocab):
+    """Resolve `query` without the network by matching it against `vocab`.
+
+    Returns the same filter dict as parse_query_github_models(), or None when
+    the parse is not confident: nothing matched, or some word was neither a
+    known value nor a stopword (e.g. "last summer"), which is left to the LLM.
+    """
+    tokens = _tokens(query)
+    used = set()
+    filters = {"categories": [], "regions": [], "years": [], "payment_methods": []}
+
+    # Longest phrases first so "Cash on Delivery" wins over any single word in it
+    candidates = [(key, v) for key in ("categories", "regions", "payment_methods") for v in vocab[key]]
+    for key, value in sorted(candidates, key=lambda kv: -len(_tokens(kv[1]))):
+        span = _match_phrase(tokens, used, value)
+        if span:
+            used |= span
+            filters[key].append(value)
+
+    valid_years = {int(y) for y in vocab["years"]}
+    for i, tok in enumerate(tokens):
+        if i not in used and tok.isdigit() and int(tok) in valid_years:
+            used.add(i)
+            filters["years"].append(int(tok))
+
+    leftover = [t for i, t in enumerate(tokens) if i not in used and t not in STOPWORDS]
+    if leftover or not any(filters.values()):
+        return None
+
+    for key in ("categories", "regions", "payment_methods"):
+        filters[key] = [v for v in vocab[key] if v in filters[key]]
+    filters["years"] = sorted(set(filters["years"]))
+    return filters
+
+
+# --- Persistent memo of resolved queries ---
+
+class QueryMemo:
+    """Bounded query -> filters memo persisted as JSON.
+
+    Entries are tied to a hash of the vocabularies, so a dataset with new
+    categories or years does not reuse answers given for the old one.
+    """
+
+    def __init__(self, path=None, max_entries=1000):
+        self.path = path
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._vocab_key = None
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            try:
+                with open(path) as f:
+                    saved = json.load(f)
+                self._vocab_key = saved.get("vocab")
+                self._entries.update(saved.get("entries", {}))
+            except (OSError, ValueError):
+                pass  # a corrupt memo is just a cold memo
+
+    @staticmethod
+    def normalize(query):
+        return " ".join(_tokens(query))
+
+    @staticmethod
+    def vocab_key(vocab):
+        return hashlib.sha1(json.dumps(vocab, sort_keys=True, default=str).encode()).hexdigest()
+
+    def get(self, query, vocab):
+        with self._lock:
+            if self._vocab_key != self.vocab_key(vocab):
+                return None
+            return self._entries.get(self.normalize(query))
+
+    def put(self, query, vocab, filters):
+        with self._lock:
+            key = self.vocab_key(vocab)
+            if self._vocab_key != key:
+                self._entries.clear()
+                self._vocab_key = key
+            self._entries[self.normalize(query)] = filters
+            self._entries.move_to_end(self.normalize(query))
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+            self._save()
+
+    def _save(self):
+        if not self.path:
+            return
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        data = json.dumps({"vocab": self._vocab_key, "entries": self._entries})
+        write_atomic(self.path, lambda tmp: tmp.write_text(data))
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@instrument.traced("assistant")
+async def resolve_query(query, vocab, memo=None):
+    """Turn `query` into filters, paying for an LLM round trip only when needed.
+
+    Returns (filters, source) with source one of "memo", "local" or "llm".
+    """
+    if memo is not None:
+        filters = memo.get(query, vocab)
+        if filters is not None:
+            return filters, "memo"
+
+    filters = parse_query_local(query, vocab)
+    if filters is not None:
+        return filters, "local"
+
+    filters = await parse_query_github_models(query, vocab)
+    if memo is not None:
+        memo.put(query, vocab, filters)
+    return filters, "llm"
@@ -0,0 +1,127 @@
+"""Build the read-only DuckDB database the app serves from.
+
+    python src/build_db.py
+    python src/build_db.py --data data/processed/amazon_sales --out data/processed/amazon_sales.duckdb
+    python src/build_db.py --arrow        # also write amazon_sales.arrow for DATA_STORE=shared
+
+The database holds `sales`, the dataset loaded into DuckDB's own storage with
+typed columns plus `year` and `month` and sorted by order_date, `sales_cube`,
+the rollup every dashboard panel is answered from, and `build_info`, recording
+the source fingerprint and whether cube order counts are exact. The app opens
+it read-only when present, so startup skips building the cube and queries no
+longer decode parquet. Rerun this after src/ingest.py; the file is replaced
+atomically, so running workers keep reading the old one until they reopen it.
+
+With --arrow, `sales` is also written as an uncompressed Arrow IPC file that
+several workers can memory-map and share through the OS page cache (see
+src/store.py).
+"""
+import argparse
+import os
+from pathlib import Path
+
+import duckdb
+import pyarrow as pa
+
+from cache import dataset_fingerprint
+from queries import build_sales_cube, create_sales_view
+
+PROCESSED_DIR = Path(__file__).resolve().parent.parent / "data" / "processed"
+DATABASE_PATH = PROCESSED_DIR / "amazon_sales.duckdb"
+
+
+def default_data_path():
+    """Partitioned dataset written by src/ingest.py if present, else the single parquet file."""
+    dataset = PROCESSED_DIR / "amazon_sales"
+    return dataset if any(dataset.glob("**/*.parquet")) else PROCESSED_DIR / "amazon_sales.parquet"
+
+
+def build_database(data_path, db_path=DATABASE_PATH):
+    """Load data_path into a new DuckDB file at db_path; returns its build_info."""
+    db_path = Path(db_path)
+    tmp = db_path.with_name(f".{db_path.name}.{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+
+    con = duckdb.connect(str(tmp))
+    try:
+        create_sales_view(con, data_path)
+        con.execute("CREATE TABLE sales_table AS SELECT * FROM sales ORDER BY order_date")
+        con.execute("DROP VIEW sales")
+        con.execute("ALTER TABLE sales_table RENAME TO sales")
+        exact = build_sales_cube(con)
+        con.execute("""
+            CREATE TABLE build_info AS
+            SELECT $fingerprint AS source_fingerprint, $source AS source_path, $exact AS cube_is_exact, CAST(now() AS TIMESTAMP) AS built_at
+        """, {"fingerprint": dataset_fingerprint(data_path), "source": Path(data_path).as_posix(), "exact": exact})
+        con.execute("CHECKPOINT")
+        info = read_build_info(con)
+    except BaseException:
+        con.close()
+        tmp.unlink(missing_ok=True)
+        raise
+    con.close()
+
+    os.replace(tmp, db_path)
+    return info
+
+
+def export_arrow(db_path, arrow_path=None):
+    """Write the database's `sales` table to an uncompressed Arrow IPC file; returns its path.
+
+    Batches are streamed, so memory stays flat, and the source fingerprint is
+    kept in the schema metadata so readers can tell which data it holds.
+    """
+    arrow_path = Path(arrow_path or Path(db_path).with_suffix(".arrow"))
+    tmp = arrow_path.with_name(f".{arrow_path.name}.{os.getpid()}.tmp")
+    with open_database(db_path) as con:
+        fingerprint = read_build_info(con)["source_fingerprint"]
+        reader = con.execute("SELECT * FROM sales ORDER BY order_date").to_arrow_reader(65536)
+        schema = reader.schema.with_metadata({"source_fingerprint": fingerprint})
+        with pa.OSFile(str(tmp), "wb") as sink, pa.ipc.new_file(sink, schema) as writer:
+            for batch in reader:
+                writer.write_batch(pa.RecordBatch.from_arrays(batch.columns, schema=schema))
+    os.replace(tmp, arrow_path)
+    return arrow_path
+
+
+def open_database(db_path, tables=("sales", "sales_cube", "build_info")):
+    """Read-only connection to the database file at db_path as it is on disk now.
+
+    duckdb.connect(path) hands back the instance this process already holds for
+    that path, which keeps serving a file build_database() has since replaced,
+    so the file is attached to a fresh in-memory connection instead. Cursors
+    only see the main catalog, so each of `tables` gets a view there.
+    """
+    con = duckdb.connect()
+    try:
+        con.execute(f"ATTACH '{Path(db_path).as_posix()}' AS store (READ_ONLY)")
+        for table in tables:
+            con.execute(f"CREATE VIEW {table} AS SELECT * FROM store.{table}")
+    except BaseException:
+        con.close()
+        raise
+    return con
+
+
+def read_build_info(con):
+    """build_info of a database made by build_database(), as a dict."""
+    cur = con.execute("SELECT * FROM build_info")
+    return dict(zip([d[0] for d in cur.description], cur.fetchone()))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", default=str(default_data_path()), help="parquet file or partitioned dataset")
+    parser.add_argument("--out", default=str(DATABASE_PATH), help="DuckDB database file to write")
+    parser.add_argument("--arrow", action="store_true", help="also write the sales table as an Arrow IPC file next to it")
+    args = parser.parse_args(argv)
+
+    info = build_database(args.data, args.out)
+    rows = open_database(args.out).execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    print(f"Wrote {rows:,} rows from {info['source_path']} to {args.out}")
+    if args.arrow:
+        print(f"Wrote {export_arrow(args.out)}")
+
+
+if __name__ == "__main__":
+    main()
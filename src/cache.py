@@ -0,0 +1,240 @@
+import asyncio
+import hashlib
+import json
+import os
+import sys
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+from lazy import lazy_import
+
+pl = lazy_import("polars")
+
+# =============================================================================
+# Process-wide result cache
+# =============================================================================
+# Shared by every Shiny session in the worker, so popular filter combinations
+# (most of all the default view) are computed by DuckDB once and then served
+# from memory. Cached values are shared between sessions: treat them as read-only.
+# Concurrent async misses for the same key share one computation.
+# Entries can be dumped to disk as Arrow IPC files and loaded back by a restarted
+# or additional worker, as long as the dataset version still matches.
+
+
+def dataset_fingerprint(path):
+    """Cheap version tag for a data file or directory: total size and latest mtime."""
+    path = os.fspath(path)
+    if os.path.isdir(path):
+        stats = [os.stat(os.path.join(root, f)) for root, _, files in os.walk(path) for f in files]
+    else:
+        stats = [os.stat(path)]
+    size = sum(s.st_size for s in stats)
+    mtime = max((s.st_mtime_ns for s in stats), default=0)
+    return f"{size}-{mtime}"
+
+
+def _key_to_json(key):
+    return json.dumps(key, separators=(",", ":"))
+
+
+def _key_from_json(text):
+    """Inverse of _key_to_json(): JSON lists become the tuples cache keys are made of."""
+    def tuples(value):
+        return tuple(tuples(v) for v in value) if isinstance(value, list) else value
+    return tuples(json.loads(text))
+
+
+def write_atomic(path, write):
+    """Call write(tmp_path), then move the file into place so readers never see a partial file.
+
+    The temporary name is unique per process and thread, so concurrent writers
+    never write into each other's file; the last one to finish wins.
+    """
+    path = Path(path)
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    except BaseException:
+        tmp.unlink(missing_ok=True)
+        raise
+
+
+def _sizeof(value):
+    """Approximate in-memory size of a cached result in bytes."""
+    if hasattr(value, "memory_usage"):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    if hasattr(value, "estimated_size"):
+        return int(value.estimated_size())
+    if hasattr(value, "nbytes"):
+        return int(value.nbytes)
+    return sys.getsizeof(value)
+
+
+class ResultCache:
+    """Thread-safe LRU cache bounded by entry count and total bytes.
+
+    Entries belong to a dataset version; calling set_version() with a new
+    fingerprint drops everything computed against the old data.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024, version=None):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.coalesced = 0
+        self._entries = OrderedDict()
+        self._pending = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def __contains__(self, key):
+        """Membership test that leaves the LRU order and hit/miss counters alone."""
+        with self._lock:
+            return key in self._entries
+
+    def get(self, key, default=None):
+        with self._lock:
+            if key not in self._entries:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return self._entries[key][0]
+
+    def put(self, key, value, version=None):
+        """Store value under key; skipped if computed against a stale `version`."""
+        size = _sizeof(value)
+        with self._lock:
+            if version is not None and version != self.version:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            if size > self.max_bytes:
+                return
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, computing and storing it on a miss."""
+        sentinel = object()
+        version = self.version
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.put(key, value, version)
+        return value
+
+    async def get_or_compute_async(self, key, compute):
+        """Like get_or_compute(), for an async compute() (e.g. a query on a thread pool).
+
+        Callers that miss on a key already being computed await that computation
+        instead of starting their own. A caller being cancelled never cancels
+        the shared computation.
+        """
+        sentinel = object()
+        version = self.version
+        value = self.get(key, sentinel)
+        if value is not sentinel:
+            return value
+
+        pending_key = (version, key)
+        task = self._pending.get(pending_key)
+        if task is None:
+            async def compute_and_store():
+                result = await compute()
+                self.put(key, result, version)
+                return result
+
+            task = asyncio.ensure_future(compute_and_store())
+            self._pending[pending_key] = task
+            task.add_done_callback(lambda _: self._pending.pop(pending_key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(task)
+
+    def dump(self, directory, keys=None, tag=""):
+        """Write polars entries (all, or those under `keys`) to directory as Arrow IPC files.
+
+        The manifest records the cache version and `tag` (e.g. a hash of the
+        query code); load() ignores a dump made for anything else. Files from
+        earlier dumps are removed. Returns the number of entries written.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        with self._lock:
+            version = self.version
+            items = [(k, v) for k, (v, _) in self._entries.items() if keys is None or k in keys]
+
+        files = {}
+        for key, value in items:
+            if not hasattr(value, "write_ipc"):
+                continue
+            text = _key_to_json(key)
+            name = hashlib.sha1(text.encode()).hexdigest()[:16] + ".arrow"
+            write_atomic(directory / name, value.write_ipc)
+            files[name] = text
+
+        manifest = {"version": version, "tag": tag, "entries": files}
+        write_atomic(directory / "manifest.json", lambda tmp: tmp.write_text(json.dumps(manifest)))
+        for stale in directory.glob("*.arrow"):
+            if stale.name not in files:
+                stale.unlink(missing_ok=True)
+        return len(files)
+
+    def load(self, directory, tag=""):
+        """Load entries dumped for the current version and `tag`; returns the number loaded."""
+        try:
+            manifest = json.loads((Path(directory) / "manifest.json").read_text())
+        except (OSError, ValueError):
+            return 0
+        if manifest.get("version") != self.version or manifest.get("tag") != tag:
+            return 0
+
+        loaded = 0
+        for name, text in manifest["entries"].items():
+            try:
+                value = pl.read_ipc(Path(directory) / name, memory_map=False)
+            except OSError:
+                continue  # replaced by a newer dump since the manifest was read
+            self.put(_key_from_json(text), value, manifest["version"])
+            loaded += 1
+        return loaded
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def set_version(self, version):
+        """Point the cache at a dataset version, clearing it if the version changed."""
+        with self._lock:
+            if version != self.version:
+                self._entries.clear()
+                self._bytes = 0
+                self.version = version
+
+    def stats(self):
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "coalesced": self.coalesced,
+                "hit_rate": self.hits / lookups if lookups else 0.0,
+                "version": self.version,
+            }
+
+    def __len__(self):
+        return len(self._entries)
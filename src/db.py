@@ -0,0 +1,91 @@
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import instrument
+
+# =============================================================================
+# DuckDB cursor pool
+# =============================================================================
+# A DuckDB connection must not be shared between threads that query at the same
+# time, and a synchronous con.execute() inside a reactive calc blocks the event
+# loop for every session in the worker. QueryPool runs queries on a bounded
+# thread pool where each worker thread owns its own cursor on the shared
+# database, and exposes an awaitable entry point for async reactive calcs.
+# `setup` is called on every new cursor, for stores that bind per-connection
+# state such as a registered Arrow table (see src/store.py). swap() points the
+# pool at a reloaded database without interrupting queries already running.
+
+DEFAULT_CONCURRENCY = int(os.getenv("DUCKDB_MAX_CONCURRENCY", "4"))
+
+
+class QueryPool:
+    """Bounded pool of DuckDB cursors, one per worker thread."""
+
+    def __init__(self, con, max_workers=DEFAULT_CONCURRENCY, setup=None):
+        self.con = con
+        self.setup = setup
+        self.max_workers = max_workers
+        self.generation = 0
+        self._local = threading.local()
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="duckdb")
+
+    def open_cursor(self):
+        """New cursor on the shared database, owned by the caller."""
+        cur = self.con.cursor()
+        if self.setup is not None:
+            self.setup(cur)
+        return cur
+
+    def cursor(self):
+        """Cursor owned by the calling thread (created on first use)."""
+        cur = getattr(self._local, "cursor", None)
+        if cur is None or self._local.generation != self.generation:
+            cur = self._local.cursor = instrument.trace_cursor(self.open_cursor())
+            self._local.generation = self.generation
+        return cur
+
+    def swap(self, con, setup=None):
+        """Send new queries to another database.
+
+        Queries already running finish on their old cursors. The worker threads
+        are replaced and the calling thread drops its cursor, so the old
+        database is released as soon as those queries return.
+        """
+        old_executor = self._executor
+        self.con, self.setup = con, setup
+        self.generation += 1
+        self._local.cursor = None
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="duckdb")
+        old_executor.shutdown(wait=False)
+
+    def run(self, fn, *args, **kwargs):
+        """Call fn(cursor, *args, **kwargs) synchronously in the calling thread."""
+        with instrument.span("query", fn.__name__) as span:
+            return span.describe(fn(self.cursor(), *args, **kwargs))
+
+    async def run_async(self, fn, *args, **kwargs):
+        """Call fn(cursor, *args, **kwargs) on the pool without blocking the event loop."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(self.run, fn, *args, **kwargs))
+
+    async def stream_async(self, fn, *args, **kwargs):
+        """Async iterator over fn(cursor, *args, **kwargs), a generator run on a cursor of its own.
+
+        Every step of the generator, and so every query and batch fetch, runs on
+        the pool, so a long export never blocks the event loop.
+        """
+        loop = asyncio.get_running_loop()
+        cur = self.open_cursor()
+        done = object()
+        try:
+            items = await loop.run_in_executor(self._executor, lambda: iter(fn(cur, *args, **kwargs)))
+            while (item := await loop.run_in_executor(self._executor, next, items, done)) is not done:
+                yield item
+        finally:
+            cur.close()
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
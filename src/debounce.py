@@ -0,0 +1,60 @@
+import time
+
+from shiny import reactive, req
+from shiny.types import SilentException
+
+_UNSET = object()
+
+
+def debounce(delay_s):
+    """Turn a reactive calc into one that only updates once its inputs settle.
+
+    Use inside a server function. The first value passes straight through;
+    after that a new value is published once the inputs have been quiet for
+    `delay_s`, and only if it differs from the last published value. A burst
+    of changes therefore costs at most one downstream recomputation, and a
+    burst that ends where it started costs none.
+    """
+    def decorator(fn):
+        latest = reactive.calc(fn)
+        published = reactive.value(_UNSET)
+        deadline = reactive.value(None)
+
+        # Higher priority than outputs, so the first value is published before
+        # anything downstream tries to read it.
+        @reactive.effect(priority=1)
+        def _arm():
+            try:
+                latest()
+            except SilentException:
+                return
+            with reactive.isolate():
+                if published() is _UNSET:
+                    published.set(latest())
+                else:
+                    deadline.set(time.monotonic() + delay_s)
+
+        @reactive.effect(priority=1)
+        def _fire():
+            due = deadline()
+            if due is None:
+                return
+            remaining = due - time.monotonic()
+            if remaining > 0:
+                reactive.invalidate_later(remaining)
+                return
+            with reactive.isolate():
+                deadline.set(None)
+                value = latest()
+                if value != published():
+                    published.set(value)
+
+        @reactive.calc
+        def debounced():
+            value = published()
+            req(value is not _UNSET)
+            return value
+
+        return debounced
+
+    return decorator
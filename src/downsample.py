@@ -0,0 +1,54 @@
+from lazy import lazy_import
+
+np = lazy_import("numpy")
+pl = lazy_import("polars")
+
+
+def lttb(x, y, n_out):
+    """Indices of the n_out points Largest-Triangle-Three-Buckets keeps from (x, y).
+
+    x must be sorted. The first and last points are always kept; every bucket
+    in between contributes the point forming the largest triangle with the
+    previously kept point and the average of the next bucket, which preserves
+    peaks and dips that plain striding would drop.
+    """
+    x = np.asarray(x, dtype="float64")
+    y = np.asarray(y, dtype="float64")
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    edges = np.linspace(1, n - 1, n_out - 1).astype(int)
+    keep = np.empty(n_out, dtype=int)
+    keep[0], keep[-1] = 0, n - 1
+
+    prev = 0
+    for i in range(n_out - 2):
+        start, stop = edges[i], edges[i + 1]
+        next_stop = edges[i + 2] if i + 2 < len(edges) else n
+        avg_x = x[stop:next_stop].mean()
+        avg_y = y[stop:next_stop].mean()
+
+        area = np.abs(
+            (x[prev] - avg_x) * (y[start:stop] - y[prev])
+            - (x[prev] - x[start:stop]) * (avg_y - y[prev])
+        )
+        prev = start + int(area.argmax())
+        keep[i + 1] = prev
+    return keep
+
+
+def downsample(frame, x, y, max_points, by=None):
+    """Reduce each series of a polars frame to at most max_points rows with LTTB.
+
+    Rows must be sorted by x within each series; `by` names the column that
+    splits the frame into series (None for a single series).
+    """
+    groups = frame.partition_by(by, maintain_order=True) if by else [frame]
+    parts = []
+    for part in groups:
+        if part.height > max_points:
+            x_values = part[x].cast(pl.Int64) if part[x].dtype.is_temporal() else part[x]
+            part = part[lttb(x_values.to_numpy(), part[y].to_numpy(), max_points)]
+        parts.append(part)
+    return pl.concat(parts) if parts else frame
@@ -0,0 +1,66 @@
+"""Stream query results to the browser as CSV or Parquet, one record batch at a time.
+
+Both writers take a pyarrow RecordBatchReader (e.g. DuckDB's
+to_arrow_reader()) and yield encoded bytes per batch, so an export never
+holds more than one batch plus its encoded form in memory.
+"""
+import io
+
+from lazy import lazy_import
+
+pa_csv = lazy_import("pyarrow.csv")
+pq = lazy_import("pyarrow.parquet")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file that hands out what was written since the last drain().
+
+    tell() keeps counting across drains, which the Parquet writer relies on
+    to record column chunk offsets in the footer.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._position
+
+    def drain(self):
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def stream_csv(reader):
+    """Yield CSV bytes for each batch of `reader`, with the header in the first chunk."""
+    header = True
+    for batch in reader:
+        out = io.BytesIO()
+        pa_csv.write_csv(batch, out, pa_csv.WriteOptions(include_header=header))
+        header = False
+        yield out.getvalue()
+    if header:
+        # No rows: still send the header so the file opens with the right columns
+        out = io.BytesIO()
+        pa_csv.write_csv(reader.schema.empty_table(), out)
+        yield out.getvalue()
+
+
+def stream_parquet(reader, compression="zstd"):
+    """Yield a Parquet file for `reader`, one row group per batch."""
+    sink = _ChunkSink()
+    with pq.ParquetWriter(sink, reader.schema, compression=compression) as writer:
+        for batch in reader:
+            writer.write_batch(batch)
+            yield sink.drain()
+    yield sink.drain()
@@ -0,0 +1,102 @@
+"""Ingest raw sales CSV drops into the partitioned Parquet dataset the app reads.
+
+Rebuild the dataset from the raw CSV:
+
+    python src/ingest.py data/raw/amazon_sales_dataset.csv
+
+Append a new batch without rewriting existing files:
+
+    python src/ingest.py new_orders.csv --append
+
+The output is Hive-partitioned by year and product_category, so DuckDB skips
+whole files for a narrow sidebar selection, and each file is sorted by
+order_date so row-group min/max statistics prune date ranges within it.
+"""
+import argparse
+import shutil
+from pathlib import Path
+
+import duckdb
+
+DATASET_DIR = Path(__file__).resolve().parent.parent / "data" / "processed" / "amazon_sales"
+PARTITION_BY = ("year", "product_category")
+ROW_GROUP_SIZE = 65536
+
+# Raw CSV schema, typed to match data/processed/amazon_sales.parquet
+CSV_COLUMNS = {
+    "order_id": "BIGINT",
+    "order_date": "DATE",
+    "product_id": "BIGINT",
+    "product_category": "VARCHAR",
+    "price": "DOUBLE",
+    "discount_percent": "BIGINT",
+    "quantity_sold": "BIGINT",
+    "customer_region": "VARCHAR",
+    "payment_method": "VARCHAR",
+    "rating": "DOUBLE",
+    "review_count": "BIGINT",
+    "discounted_price": "DOUBLE",
+    "total_revenue": "VARCHAR",
+}
+
+
+def write_dataset(con, select_sql, out_dir=DATASET_DIR, append=False, row_group_size=ROW_GROUP_SIZE):
+    """Write the rows of select_sql into the partitioned dataset at out_dir; returns rows written.
+
+    select_sql must produce the SALES_COLUMNS plus `year`, typed as in the
+    processed parquet. Rows are sorted by order_date within every file.
+    """
+    out_dir = Path(out_dir)
+    if not append and out_dir.exists():
+        shutil.rmtree(out_dir)
+    out_dir.parent.mkdir(parents=True, exist_ok=True)
+
+    return con.execute(f"""
+        COPY (
+            {select_sql}
+            ORDER BY order_date
+        ) TO '{out_dir.as_posix()}' (
+            FORMAT parquet,
+            PARTITION_BY ({", ".join(PARTITION_BY)}),
+            ROW_GROUP_SIZE {int(row_group_size)},
+            COMPRESSION zstd,
+            FILENAME_PATTERN 'part_{{uuid}}',
+            {"APPEND" if append else "OVERWRITE_OR_IGNORE"}
+        )
+    """).fetchone()[0]
+
+
+def ingest_csv(csv_paths, out_dir=DATASET_DIR, append=False, row_group_size=ROW_GROUP_SIZE, con=None):
+    """Write CSV files into the partitioned dataset at out_dir; returns rows written.
+
+    Without append the dataset is rebuilt from scratch. With append, new files
+    are added next to the existing ones in each partition.
+    """
+    con = con or duckdb.connect()
+    columns = ", ".join(f"'{name}': '{dtype}'" for name, dtype in CSV_COLUMNS.items())
+    files = ", ".join(f"'{Path(p).as_posix()}'" for p in csv_paths)
+    return write_dataset(con, f"""
+        SELECT
+            * REPLACE (
+                CAST(order_date AS TIMESTAMP) AS order_date,
+                COALESCE(TRY_CAST(total_revenue AS DOUBLE), 0) AS total_revenue
+            ),
+            year(order_date) AS year
+        FROM read_csv([{files}], header = true, columns = {{{columns}}})
+    """, out_dir, append, row_group_size)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("csv", nargs="+", help="raw CSV file(s) with the amazon_sales columns")
+    parser.add_argument("--out", default=str(DATASET_DIR), help="partitioned dataset directory")
+    parser.add_argument("--append", action="store_true", help="add to the existing dataset instead of rebuilding it")
+    parser.add_argument("--row-group-size", type=int, default=ROW_GROUP_SIZE)
+    args = parser.parse_args(argv)
+
+    rows = ingest_csv(args.csv, args.out, append=args.append, row_group_size=args.row_group_size)
+    print(f"{'Appended' if args.append else 'Wrote'} {rows:,} rows to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,287 @@
+import contextlib
+import contextvars
+import functools
+import inspect
+import json
+import os
+import threading
+import time
+from pathlib import Path
+
+# =============================================================================
+# Hot-path instrumentation
+# =============================================================================
+# Set INSTRUMENT=1 to time reactive calcs, render functions, pooled DuckDB
+# queries and LLM calls. Every span is appended to a JSONL trace file
+# (INSTRUMENT_TRACE_PATH) with rows and bytes of its result, statements slower
+# than INSTRUMENT_SLOW_QUERY_MS also get DuckDB's JSON query profile, and
+# latency histograms are served in Prometheus text format at /metrics.
+#
+# When disabled, traced() and trace_cursor() return their argument unchanged
+# and span() hands out one shared no-op span, so the hot path pays at most an
+# attribute lookup and an empty context manager.
+
+ENABLED = os.getenv("INSTRUMENT", "0").lower() in ("1", "true", "yes")
+TRACE_PATH = os.getenv("INSTRUMENT_TRACE_PATH", str(Path(__file__).resolve().parent.parent / "data" / "cache" / "traces.jsonl"))
+SLOW_QUERY_MS = float(os.getenv("INSTRUMENT_SLOW_QUERY_MS", "250"))
+
+# Histogram bucket upper bounds, in seconds
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def describe(result):
+    """Rows and bytes of a span's result: polars frames, DataGrids, plotly figures and strings."""
+    frame = getattr(result, "data", result)
+    if hasattr(frame, "estimated_size"):
+        return {"rows": frame.height, "bytes": int(frame.estimated_size())}
+    if hasattr(result, "to_plotly_json"):
+        return {"traces": len(result.data), "bytes": len(result.to_json())}
+    if isinstance(result, str):
+        return {"bytes": len(result)}
+    return {}
+
+
+class Histogram:
+    """Cumulative latency histogram in the Prometheus layout."""
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds):
+        self.count += 1
+        self.sum += seconds
+        for i, bound in enumerate(BUCKETS):
+            if seconds <= bound:
+                self.counts[i] += 1
+
+
+class Tracer:
+    """Span recorder writing to a JSONL sink and keeping per-span histograms."""
+
+    def __init__(self, trace_path=TRACE_PATH, slow_query_ms=SLOW_QUERY_MS):
+        self.trace_path = Path(trace_path) if trace_path else None
+        self.slow_query_ms = slow_query_ms
+        self.histograms = {}
+        self.slow_queries = 0
+        self.gauges = {}
+        self._sink = None
+        self._lock = threading.Lock()
+
+    def record(self, kind, name, seconds, **attrs):
+        line = json.dumps({"ts": time.time(), "kind": kind, "name": name, "ms": round(seconds * 1000, 3), **attrs}, default=str)
+        with self._lock:
+            self.histograms.setdefault((kind, name), Histogram()).observe(seconds)
+            if self.trace_path is not None:
+                if self._sink is None:
+                    self.trace_path.parent.mkdir(parents=True, exist_ok=True)
+                    self._sink = open(self.trace_path, "a", buffering=1)
+                self._sink.write(line + "\n")
+
+    def metrics_text(self):
+        """All histograms and registered gauges in Prometheus text exposition format."""
+        lines = [
+            "# HELP app_span_seconds Duration of instrumented calcs, renders, queries and LLM calls.",
+            "# TYPE app_span_seconds histogram",
+        ]
+        with self._lock:
+            for (kind, name), h in sorted(self.histograms.items()):
+                labels = f'kind="{kind}",name="{name}"'
+                for bound, count in zip(BUCKETS, h.counts):
+                    lines.append(f'app_span_seconds_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'app_span_seconds_bucket{{{labels},le="+Inf"}} {h.count}')
+                lines.append(f"app_span_seconds_sum{{{labels}}} {h.sum:.6f}")
+                lines.append(f"app_span_seconds_count{{{labels}}} {h.count}")
+            lines += [
+                "# HELP app_slow_queries_total DuckDB statements slower than INSTRUMENT_SLOW_QUERY_MS.",
+                "# TYPE app_slow_queries_total counter",
+                f"app_slow_queries_total {self.slow_queries}",
+            ]
+        for name, (help_text, fn) in self.gauges.items():
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} gauge"]
+            for key, value in fn().items():
+                if isinstance(value, (int, float)):
+                    lines.append(f'{name}{{stat="{key}"}} {value}')
+        return "\n".join(lines) + "\n"
+
+    def close(self):
+        with self._lock:
+            if self._sink is not None:
+                self._sink.close()
+                self._sink = None
+
+
+tracer = Tracer() if ENABLED else None
+
+# Name of the enclosing query span, used to label the statements it runs
+_current_query = contextvars.ContextVar("current_query", default=None)
+
+
+def configure(enabled, trace_path=TRACE_PATH, slow_query_ms=SLOW_QUERY_MS):
+    """Switch instrumentation on or off; affects functions decorated afterwards."""
+    global tracer
+    if tracer is not None:
+        tracer.close()
+    tracer = Tracer(trace_path, slow_query_ms) if enabled else None
+    return tracer
+
+
+class _Span(dict):
+    """Attributes of an open span; describe() adds the rows and bytes of a result."""
+
+    def describe(self, result):
+        self.update(describe(result))
+        return result
+
+
+class _NullSpan:
+    def describe(self, result):
+        return result
+
+
+_NULL_SPAN = _NullSpan()
+_NULL_CONTEXT = contextlib.nullcontext(_NULL_SPAN)
+
+
+def span(kind, name, **attrs):
+    """Context manager timing a block; yields a span whose describe() records the result size."""
+    if tracer is None:
+        return _NULL_CONTEXT
+    return _timed_span(tracer, kind, name, attrs)
+
+
+@contextlib.contextmanager
+def _timed_span(t, kind, name, attrs):
+    s = _Span(attrs)
+    token = _current_query.set(name) if kind == "query" else None
+    start = time.perf_counter()
+    try:
+        yield s
+    except BaseException as e:
+        s["error"] = type(e).__name__
+        raise
+    finally:
+        t.record(kind, name, time.perf_counter() - start, **s)
+        if token is not None:
+            _current_query.reset(token)
+
+
+def traced(kind="calc", name=None):
+    """Decorator timing a sync or async function as a span named after it."""
+    def decorate(fn):
+        if tracer is None:
+            return fn
+        span_name = name or fn.__name__
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                with span(kind, span_name) as s:
+                    return s.describe(await fn(*args, **kwargs))
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                with span(kind, span_name) as s:
+                    return s.describe(fn(*args, **kwargs))
+        return wrapper
+    return decorate
+
+
+class TracedCursor:
+    """DuckDB cursor proxy timing execute() and profiling slow statements.
+
+    DuckDB's own profiler runs on the cursor ('no_output' mode), so a slow
+    statement's profile comes from the execution the caller asked for rather
+    than a second EXPLAIN ANALYZE run. DuckDB only completes a profile once
+    the result has been read, so a slow statement is recorded after a fetch
+    that reads its whole result, or before the next statement on the cursor.
+    A profiling failure is recorded on the span and never fails the query.
+    """
+
+    # Fetches that read the whole result, after which its profile is complete
+    _FULL_FETCHES = {"pl", "df", "fetchdf", "fetchall", "arrow", "fetch_arrow_table", "fetchnumpy"}
+
+    def __init__(self, cursor, t):
+        self._cursor = cursor
+        self._tracer = t
+        self._pending = None
+        try:
+            cursor.execute("PRAGMA enable_profiling = 'no_output'")
+        except Exception as e:  # noqa: BLE001 - trace without profiles rather than fail
+            self._profiling_error = f"{type(e).__name__}: {e}"
+        else:
+            self._profiling_error = None
+
+    def execute(self, sql, parameters=None):
+        self._record_pending()
+        start = time.perf_counter()
+        self._cursor.execute(sql, parameters)
+        seconds = time.perf_counter() - start
+
+        attrs = {"sql": " ".join(sql.split())[:500]}
+        name = _current_query.get() or "other"
+        if seconds * 1000 >= self._tracer.slow_query_ms and sql.lstrip().upper().startswith(("SELECT", "WITH")):
+            with self._tracer._lock:
+                self._tracer.slow_queries += 1
+            self._pending = (name, seconds, attrs)
+        else:
+            self._tracer.record("sql", name, seconds, **attrs)
+        return self
+
+    def _record_pending(self):
+        """Record the last slow statement with the profile DuckDB kept for it."""
+        if self._pending is None:
+            return
+        name, seconds, attrs = self._pending
+        self._pending = None
+        if self._profiling_error is not None:
+            attrs["profile_error"] = self._profiling_error
+        else:
+            try:
+                attrs["profile"] = json.loads(self._cursor.get_profiling_information(format="json"))
+            except Exception as e:  # noqa: BLE001 - the query itself already succeeded
+                attrs["profile_error"] = f"{type(e).__name__}: {e}"
+        self._tracer.record("sql", name, seconds, **attrs)
+
+    def close(self):
+        self._record_pending()
+        return self._cursor.close()
+
+    def __getattr__(self, attr):
+        value = getattr(self._cursor, attr)
+        if attr not in self._FULL_FETCHES:
+            return value
+
+        @functools.wraps(value)
+        def fetch(*args, **kwargs):
+            result = value(*args, **kwargs)
+            self._record_pending()
+            return result
+        return fetch
+
+
+def trace_cursor(cursor):
+    """Wrap a DuckDB cursor so its statements are traced; the cursor itself when disabled."""
+    return cursor if tracer is None else TracedCursor(cursor, tracer)
+
+
+def register_gauge(name, help_text, fn):
+    """Export fn()'s numeric values as `name{stat=...}` on /metrics."""
+    if tracer is not None:
+        tracer.gauges[name] = (help_text, fn)
+
+
+def with_metrics_endpoint(app):
+    """Serve `app` with a Prometheus /metrics route next to it; `app` itself when disabled."""
+    if tracer is None:
+        return app
+
+    from starlette.applications import Starlette
+    from starlette.responses import PlainTextResponse
+    from starlette.routing import Mount, Route
+
+    async def metrics(request):
+        return PlainTextResponse(tracer.metrics_text(), media_type="text/plain; version=0.0.4")
+
+    return Starlette(routes=[Route("/metrics", metrics), Mount("/", app=app)])
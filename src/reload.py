@@ -0,0 +1,56 @@
+import threading
+import warnings
+
+# =============================================================================
+# Dataset reload watcher
+# =============================================================================
+# A daemon thread polls a cheap version tag of the data (store.store_version)
+# and calls on_change(version) once a new version has held for two polls in a
+# row, so a drop that is still being copied is never loaded half-written.
+# on_change runs on the watcher thread, off the event loop. If it raises, the
+# current data stays in service and that version is skipped until the files
+# change again.
+
+
+class DatasetWatcher:
+    """Calls on_change(version) when version_fn() settles on a new value."""
+
+    def __init__(self, version_fn, on_change, interval_s):
+        self.version_fn = version_fn
+        self.on_change = on_change
+        self.interval_s = interval_s
+        self.version = self._candidate = version_fn()
+        self._stop = threading.Event()
+        self._thread = None
+        self._lock = threading.Lock()
+
+    def check(self):
+        """Poll once; returns True if on_change ran for a new version."""
+        try:
+            version = self.version_fn()
+        except OSError:
+            return False  # files are being replaced; look again next poll
+        settled, self._candidate = version == self._candidate, version
+        if not settled or version == self.version:
+            return False
+        self.version = version
+        try:
+            self.on_change(version)
+        except Exception as e:  # noqa: BLE001 - keep serving the data already loaded
+            warnings.warn(f"Reloading the data failed; still serving the previous version: {e}")
+            return False
+        return True
+
+    def start(self):
+        """Poll every interval_s seconds in the background; no-op if started or interval_s <= 0."""
+        with self._lock:
+            if self._thread is None and self.interval_s > 0:
+                self._thread = threading.Thread(target=self._run, name="data-reload", daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        while not self._stop.wait(self.interval_s):
+            self.check()
+
+    def stop(self):
+        self._stop.set()
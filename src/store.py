@@ -0,0 +1,95 @@
+import warnings
+from pathlib import Path
+
+import duckdb
+
+from lazy import lazy_import
+from build_db import open_database, read_build_info
+from cache import dataset_fingerprint
+from queries import build_sales_cube, create_sales_view
+
+pa = lazy_import("pyarrow")
+
+# =============================================================================
+# Opening the sales data
+# =============================================================================
+# Three ways to serve the same `sales` and `sales_cube` names (DATA_STORE):
+#
+# - "parquet": an in-memory DuckDB with a view over the parquet files and a
+#   cube built at startup.
+# - "duckdb": the read-only database from src/build_db.py. Startup is cheap,
+#   but every worker caches the blocks it reads in its own buffer pool.
+# - "shared": `sales` is the Arrow IPC file from `build_db.py --arrow`,
+#   memory-mapped, so N workers read one copy through the OS page cache, and
+#   the small cube comes from the read-only database. DuckDB binds a Python
+#   Arrow table per connection, so every cursor must pass through the
+#   returned setup function.
+#
+# "auto" picks "duckdb" when the database is present and matches the data,
+# else "parquet". A database or Arrow file built from older data is never used.
+# The database is always opened through build_db.open_database(), so a file
+# rebuilt under a running app is read as it is now on a reload.
+
+STORE_MODES = ("auto", "parquet", "duckdb", "shared")
+
+
+def _cube_source(exact):
+    # Answer panels from the cube unless order counts would not add up exactly
+    return "sales_cube" if exact else "sales"
+
+
+def _is_current(db_path, data_path):
+    """build_info of db_path if it exists and was built from data_path as it is now, else None."""
+    if not Path(db_path).is_file():
+        return None
+    with open_database(db_path, ("build_info",)) as con:
+        info = read_build_info(con)
+    return info if info["source_fingerprint"] == dataset_fingerprint(data_path) else None
+
+
+def map_arrow_table(arrow_path, fingerprint):
+    """Memory-map an Arrow IPC file written by build_db.py; None if it was built from other data."""
+    table = pa.ipc.open_file(pa.memory_map(str(arrow_path))).read_all()
+    metadata = table.schema.metadata or {}
+    return table if metadata.get(b"source_fingerprint") == fingerprint.encode() else None
+
+
+def open_store(data_path, db_path, arrow_path=None, mode="auto"):
+    """Open the sales data as described above; returns (con, snapshot_source, setup_cursor).
+
+    setup_cursor(cursor) must be called on every new cursor before it queries;
+    it is None unless the mode needs it.
+    """
+    if mode not in STORE_MODES:
+        raise ValueError(f"Unknown DATA_STORE: {mode}")
+
+    if mode != "parquet":
+        info = _is_current(db_path, data_path)
+        table = None
+        if info is not None and mode == "shared":
+            arrow_path = Path(arrow_path or Path(db_path).with_suffix(".arrow"))
+            table = map_arrow_table(arrow_path, info["source_fingerprint"]) if arrow_path.is_file() else None
+        if table is not None:
+            con = open_database(db_path, ("sales_cube",))
+
+            def setup_cursor(cursor):
+                cursor.register("sales", table)
+
+            setup_cursor(con)
+            return con, _cube_source(info["cube_is_exact"]), setup_cursor
+        if info is not None:
+            if mode == "shared":
+                warnings.warn(f"No Arrow file built from {data_path}; using the DuckDB database. Rebuild it with src/build_db.py --arrow.")
+            return open_database(db_path), _cube_source(info["cube_is_exact"]), None
+        if mode != "auto" or Path(db_path).is_file():
+            warnings.warn(f"No database built from {data_path}; querying parquet. Rebuild it with src/build_db.py.")
+
+    con = duckdb.connect()
+    create_sales_view(con, data_path)
+    return con, _cube_source(build_sales_cube(con)), None
+
+
+def store_version(data_path, db_path, arrow_path=None):
+    """Version tag of every file open_store() may read; changes when the data or a built store is replaced."""
+    arrow_path = Path(arrow_path or Path(db_path).with_suffix(".arrow"))
+    return tuple(dataset_fingerprint(p) if Path(p).exists() else None for p in (data_path, db_path, arrow_path))
@@ -0,0 +1,80 @@
+"""Local stand-in for the GitHub Models chat completions endpoint.
+
+Answers like the real API, picking filters by plain substring matching against
+the vocabularies listed in the prompt, so the AI Assistant can be exercised
+offline. Run it next to the app with:
+
+    python tests/llm_stub.py --port 8001 --delay 2
+    GITHUB_MODELS_URL=http://127.0.0.1:8001/chat/completions GITHUB_TOKEN=stub shiny run src/app.py
+"""
+import argparse
+import ast
+import json
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def _prompt_list(prompt, label):
+    match = re.search(rf"{label}: (\[.*?\])", prompt)
+    return ast.literal_eval(match.group(1)) if match else []
+
+
+def stub_filters(prompt):
+    """Filters a well-behaved model would return for the user prompt."""
+    query = prompt.split("User query:", 1)[-1].lower()
+    pick = lambda label: [v for v in _prompt_list(prompt, label) if str(v).lower() in query]
+    return {
+        "categories": pick("Dataset categories"),
+        "regions": pick("Dataset regions"),
+        "years": [y for y in _prompt_list(prompt, "Valid years") if str(y) in query],
+        "payment_methods": pick("Dataset payment methods"),
+    }
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    delay = 0.0
+    requests_seen = 0
+
+    def do_POST(self):
+        body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        type(self).requests_seen += 1
+        time.sleep(self.delay)
+
+        content = json.dumps(stub_filters(body["messages"][-1]["content"]))
+        reply = json.dumps({"choices": [{"message": {"role": "assistant", "content": content}}]}).encode()
+
+        try:
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(reply)))
+            self.end_headers()
+            self.wfile.write(reply)
+        except (BrokenPipeError, ConnectionResetError):
+            pass  # the app cancelled this request while we were "thinking"
+
+    def log_message(self, *args):
+        pass
+
+
+def start_stub_server(port=0, delay=0.0):
+    """Serve the stub on a background thread; returns (server, completions_url)."""
+    handler = type("Handler", (StubHandler,), {"delay": delay, "requests_seen": 0})
+    server = ThreadingHTTPServer(("127.0.0.1", port), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}/chat/completions"
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--delay", type=float, default=0.0, help="seconds to wait before answering")
+    args = parser.parse_args()
+
+    server, url = start_stub_server(args.port, args.delay)
+    print(f"LLM stub listening on {url}")
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,172 @@
+import asyncio
+import json
+import sys
+import os
+import threading
+import time
+
+import httpx
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from assistant import QueryMemo, parse_query_github_models, parse_query_local, resolve_query
+from llm_stub import start_stub_server
+
+VOCAB = {
+    "categories": ["Beauty", "Books", "Electronics", "Home & Kitchen"],
+    "regions": ["Asia", "Europe", "North America"],
+    "payment_methods": ["Cash on Delivery", "Credit Card", "UPI"],
+    "years": [2022, 2023],
+}
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    server, url = start_stub_server(delay=0.3)
+    monkeypatch.setenv("GITHUB_MODELS_URL", url)
+    monkeypatch.setenv("GITHUB_TOKEN", "stub-token")
+    yield server
+    server.shutdown()
+
+
+def test_parse_query_against_stub_server(stub):
+    """parse_query_github_models returns filters from a local stub endpoint.
+    This test checks the async request/response path offline;
+    it would fail if the payload, URL override or JSON parsing broke."""
+    filters = asyncio.run(parse_query_github_models("electronics in North America in 2023", VOCAB))
+
+    assert filters == {
+        "categories": ["Electronics"],
+        "regions": ["North America"],
+        "years": [2023],
+        "payment_methods": [],
+    }
+
+
+def test_parse_query_coerces_model_values(monkeypatch):
+    """parse_query_github_models returns years as ints and the other filters as strings.
+    This test checks a model answer with mixed types, a bare value and junk entries;
+    it would fail if "2024" reached the query layer as a string and sorting the years raised TypeError."""
+    content = json.dumps({"years": [2023, "2024", "soon", None], "categories": ["Books", {"name": "Beauty"}], "regions": "Asia"})
+    reply = {"choices": [{"message": {"role": "assistant", "content": content}}]}
+    monkeypatch.setenv("GITHUB_TOKEN", "stub-token")
+
+    async def parse():
+        async with httpx.AsyncClient(transport=httpx.MockTransport(lambda request: httpx.Response(200, json=reply))) as client:
+            return await parse_query_github_models("books in asia", VOCAB, client)
+
+    assert asyncio.run(parse()) == {"categories": ["Books"], "regions": ["Asia"], "years": [2023, 2024], "payment_methods": []}
+
+
+def test_parse_query_does_not_block_event_loop(stub):
+    """Concurrent assistant queries overlap instead of running one after another.
+    This test checks that the LLM call is non-blocking;
+    it would fail if the request were made with a synchronous HTTP client."""
+    async def main():
+        async with httpx.AsyncClient() as client:
+            return await asyncio.gather(*(parse_query_github_models(q, VOCAB, client) for q in ["books", "beauty", "asia"]))
+
+    t0 = time.perf_counter()
+    results = asyncio.run(main())
+    elapsed = time.perf_counter() - t0
+
+    assert [r["categories"] for r in results] == [["Books"], ["Beauty"], []]
+    assert elapsed < 0.3 * 3
+
+
+def test_parse_query_can_be_cancelled(stub):
+    """An in-flight assistant query can be cancelled.
+    This test checks cancellation when a newer query supersedes an older one;
+    it would fail if cancelling waited for the LLM to answer."""
+    async def main():
+        task = asyncio.ensure_future(parse_query_github_models("books", VOCAB))
+        await asyncio.sleep(0.05)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(asyncio.wait_for(main(), timeout=0.25))
+
+
+def test_parse_query_requires_token(monkeypatch):
+    """parse_query_github_models refuses to run without GITHUB_TOKEN.
+    This test checks the missing-credentials error;
+    it would fail if the request were sent unauthenticated."""
+    monkeypatch.delenv("GITHUB_TOKEN", raising=False)
+
+    with pytest.raises(ValueError, match="GITHUB_TOKEN"):
+        asyncio.run(parse_query_github_models("books", VOCAB))
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("electronics in North America in 2023", {"categories": ["Electronics"], "regions": ["North America"], "years": [2023], "payment_methods": []}),
+    ("credit card purchases in 2022", {"categories": [], "regions": [], "years": [2022], "payment_methods": ["Credit Card"]}),
+    ("home & kitchen paid with cash on delivery", {"categories": ["Home & Kitchen"], "regions": [], "years": [], "payment_methods": ["Cash on Delivery"]}),
+    ("electronic sales in north amerca", {"categories": ["Electronics"], "regions": ["North America"], "years": [], "payment_methods": []}),
+])
+def test_parse_query_local_resolves_vocabulary_queries(query, expected):
+    """parse_query_local resolves queries that only name known values.
+    This test checks exact, multi-word and fuzzy matching against the vocabularies;
+    it would fail if simple queries still needed the LLM or matched the wrong value."""
+    assert parse_query_local(query, VOCAB) == expected
+
+
+@pytest.mark.parametrize("query", ["books sold last summer", "sales in 2019", "what is the weather"])
+def test_parse_query_local_defers_unclear_queries(query):
+    """parse_query_local returns None when it cannot explain every word.
+    This test checks the confidence rule for the LLM fallback;
+    it would fail if partially understood queries were answered locally."""
+    assert parse_query_local(query, VOCAB) is None
+
+
+def test_resolve_query_memoizes_llm_answers(stub, tmp_path):
+    """resolve_query asks the LLM once per question and then answers from the memo.
+    This test checks the persistent memo, including reload from disk;
+    it would fail if a repeated question triggered another network round trip."""
+    path = tmp_path / "memo.json"
+    memo = QueryMemo(str(path))
+
+    filters, source = asyncio.run(resolve_query("books bought last summer", VOCAB, memo))
+    assert source == "llm"
+    assert filters["categories"] == ["Books"]
+
+    reloaded = QueryMemo(str(path))
+    again, source = asyncio.run(resolve_query("Books  bought last summer", VOCAB, reloaded))
+    assert source == "memo"
+    assert again == filters
+    assert stub.RequestHandlerClass.requests_seen == 1
+
+
+def test_query_memo_ignores_answers_for_other_vocabularies(tmp_path):
+    """QueryMemo does not reuse answers given for a different vocabulary.
+    This test checks memo invalidation when the dataset's values change;
+    it would fail if stale filters were served after new categories appeared."""
+    memo = QueryMemo(str(tmp_path / "memo.json"))
+    memo.put("gadgets", VOCAB, {"categories": ["Electronics"], "regions": [], "years": [], "payment_methods": []})
+
+    assert memo.get("gadgets", VOCAB) is not None
+    assert memo.get("gadgets", {**VOCAB, "years": [2022, 2023, 2024]}) is None
+
+
+def test_query_memo_saves_safely_from_concurrent_writers(tmp_path):
+    """Several memos saving to one file (as workers do) always leave a complete JSON memo in place.
+    This test checks each writer uses its own temporary file;
+    it would fail if one writer moved another's half-written file into place."""
+    path = tmp_path / "memo.json"
+    memos = [QueryMemo(str(path)) for _ in range(4)]
+    filters = {"categories": ["Books"], "regions": [], "years": [], "payment_methods": []}
+
+    def write(memo, n):
+        for i in range(50):
+            memo.put(f"query {n} {i}", VOCAB, filters)
+
+    threads = [threading.Thread(target=write, args=(memo, n)) for n, memo in enumerate(memos)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    saved = json.loads(path.read_text())
+    assert len(saved["entries"]) == 50
+    assert [p.name for p in tmp_path.iterdir()] == ["memo.json"]
@@ -0,0 +1,69 @@
+import asyncio
+import sys
+import os
+
+import duckdb
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../benchmarks")))
+
+from queries import create_sales_view, query_vocabularies, build_sales_cube
+from synthetic import generate
+from suite import compare
+from load_test import run
+
+PARQUET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+
+
+def test_synthetic_dataset_matches_real_schema(tmp_path):
+    """The synthetic generator writes the real dataset's columns, types and vocabularies.
+    This test checks that benchmarks run the app's queries on faithful data;
+    it would fail if a column, type, category or region drifted from amazon_sales."""
+    assert generate(5000, tmp_path / "synthetic") == 5000
+    real, synthetic = duckdb.connect(), duckdb.connect()
+    create_sales_view(real, PARQUET_PATH)
+    create_sales_view(synthetic, tmp_path / "synthetic")
+    assert build_sales_cube(real) and build_sales_cube(synthetic)
+
+    describe = "SELECT column_name, column_type FROM (DESCRIBE sales) ORDER BY column_name"
+    assert synthetic.execute(describe).fetchall() == real.execute(describe).fetchall()
+    assert query_vocabularies(synthetic) == query_vocabularies(real)
+
+
+def test_synthetic_dataset_is_deterministic(tmp_path):
+    """The same row count and seed always produce the same rows.
+    This test checks that baselines are measured on identical data every run;
+    it would fail if the generator used unseeded randomness."""
+    sums = []
+    for run in ["a", "b"]:
+        generate(2000, tmp_path / run, seed=7)
+        con = duckdb.connect()
+        create_sales_view(con, tmp_path / run)
+        sums.append(con.execute("SELECT SUM(total_revenue), SUM(order_id * rating) FROM sales").fetchone())
+
+    assert sums[0] == sums[1]
+
+
+def test_compare_flags_only_real_slowdowns():
+    """A case regresses only when it is slower than baseline by the relative and absolute margins.
+    This test checks the benchmark regression threshold;
+    it would fail if timing noise on fast cases or new cases were reported as regressions."""
+    results = {"slow": 200.0, "noisy": 1.5, "steady": 10.2, "new": 5.0}
+    baselines = {"slow": 100.0, "noisy": 1.0, "steady": 10.0}
+
+    flagged = {name for name, _, _, regressed in compare(results, baselines, threshold=0.3, min_delta_ms=1.0) if regressed}
+    assert flagged == {"slow"}
+
+
+def test_load_test_reports_latency_and_memory():
+    """The load harness replays sessions against a real app and reports latency percentiles and RSS.
+    This test checks the session protocol driver, the LLM stub wiring and the report shape;
+    it would fail if a scripted step stopped producing the outputs it waits for."""
+    report = asyncio.run(run(users=2, iterations=2, think_s=0, llm_delay=0, ramp_s=0, seed=3))
+
+    assert report["failures"] == []
+    assert report["latency_ms"]["initial render"]["count"] == 2
+    assert report["latency_ms"]["all steps"]["count"] == 4
+    assert {"p50", "p95", "p99"} <= set(report["latency_ms"]["all steps"])
+    if sys.platform.startswith("linux"):
+        assert report["rss_mb"]["peak"] >= report["rss_mb"]["idle"] > 0
@@ -0,0 +1,55 @@
+import sys
+import os
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from build_db import build_database, read_build_info
+from cache import dataset_fingerprint
+from queries import create_sales_view, build_sales_cube, query_totals, query_dashboard_snapshot, snapshot_panel
+
+PARQUET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+FILTERS = ([2022, 2023], [3, 4, 5], ["Books", "Sports"], ["Asia", "Europe"])
+
+
+@pytest.fixture(scope="module")
+def database(tmp_path_factory):
+    path = tmp_path_factory.mktemp("db") / "amazon_sales.duckdb"
+    info = build_database(PARQUET_PATH, path)
+    return path, info
+
+
+def test_database_answers_like_parquet(database):
+    """Queries on the prebuilt read-only database match queries on the parquet view.
+    This test checks the materialized sales table and cube the app serves from;
+    it would fail if a column, type or cube row changed during the build."""
+    path, info = database
+    con = duckdb.connect(str(path), read_only=True)
+    parquet = duckdb.connect()
+    create_sales_view(parquet, PARQUET_PATH)
+    build_sales_cube(parquet)
+
+    assert query_totals(con, FILTERS) == pytest.approx(query_totals(parquet, FILTERS))
+    for source in ["sales", "sales_cube"]:
+        ours = snapshot_panel(query_dashboard_snapshot(con, FILTERS, source), "payment")
+        theirs = snapshot_panel(query_dashboard_snapshot(parquet, FILTERS, source), "payment")
+        assert ours.drop("total_revenue").equals(theirs.drop("total_revenue"))
+    describe = "SELECT column_name, column_type FROM (DESCRIBE sales)"
+    assert con.execute(describe).fetchall() == parquet.execute(describe).fetchall()
+
+
+def test_database_records_its_source_and_is_read_only(database):
+    """The database records the source fingerprint and rejects writes when opened read-only.
+    This test checks what the app uses to detect a stale database;
+    it would fail if build_info were missing or the app could modify the shared file."""
+    path, info = database
+    con = duckdb.connect(str(path), read_only=True)
+
+    assert read_build_info(con) == info
+    assert info["source_fingerprint"] == dataset_fingerprint(PARQUET_PATH)
+    assert info["cube_is_exact"]
+    with pytest.raises(duckdb.Error):
+        con.execute("CREATE TABLE scratch AS SELECT 1")
+    assert not list(path.parent.glob(".*.tmp"))
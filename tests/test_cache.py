@@ -0,0 +1,155 @@
+import asyncio
+import sys
+import os
+
+import polars as pl
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from cache import ResultCache, dataset_fingerprint
+from queries import normalize_filters
+
+
+def test_result_cache_evicts_least_recently_used():
+    """ResultCache evicts the least recently used entry when full.
+    This test checks LRU ordering;
+    it would fail if a recently read entry were evicted before an idle one."""
+    cache = ResultCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.stats()["evictions"] == 1
+
+
+def test_result_cache_is_bounded_by_bytes():
+    """ResultCache keeps its total size under max_bytes.
+    This test checks the memory bound;
+    it would fail if large values accumulated past the configured budget."""
+    cache = ResultCache(max_entries=100, max_bytes=1000)
+    for i in range(10):
+        cache.put(i, b"x" * 300)
+
+    assert cache.stats()["bytes"] <= 1000
+    assert len(cache) < 10
+
+
+def test_result_cache_measures_polars_frames():
+    """ResultCache charges polars snapshots their real size, not the Python object size.
+    This test checks byte accounting for the Arrow-backed snapshot frames;
+    it would fail if large frames were counted as a few dozen bytes and never evicted."""
+    cache = ResultCache(max_entries=100, max_bytes=10_000)
+    cache.put("frame", pl.DataFrame({"x": range(1000)}))
+
+    assert cache.stats()["bytes"] >= 8000
+
+
+def test_get_or_compute_counts_hits_and_misses():
+    """get_or_compute only calls compute on a miss and counts hits and misses.
+    This test checks that duplicate lookups never recompute;
+    it would fail if cached results were recomputed or counters were wrong."""
+    cache = ResultCache()
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "snapshot"
+
+    assert cache.get_or_compute("k", compute) == "snapshot"
+    assert cache.get_or_compute("k", compute) == "snapshot"
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+
+def test_concurrent_misses_share_one_computation():
+    """Concurrent async misses for one key run compute once and all get its result.
+    This test checks cross-session coalescing of identical dashboard queries;
+    it would fail if every waiting session started its own DuckDB query."""
+    cache = ResultCache()
+    calls = []
+
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.05)
+        return "snapshot"
+
+    async def main():
+        return await asyncio.gather(*[cache.get_or_compute_async("k", compute) for _ in range(5)])
+
+    assert asyncio.run(main()) == ["snapshot"] * 5
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 4
+    assert cache.get("k") == "snapshot"
+
+
+def test_cancelled_waiter_does_not_cancel_shared_computation():
+    """Cancelling one waiter leaves the shared computation running for the others.
+    This test checks that a session leaving mid-query cannot break other sessions;
+    it would fail if cancellation propagated into the shared task."""
+    cache = ResultCache()
+
+    async def compute():
+        await asyncio.sleep(0.05)
+        return "snapshot"
+
+    async def main():
+        first = asyncio.ensure_future(cache.get_or_compute_async("k", compute))
+        second = asyncio.ensure_future(cache.get_or_compute_async("k", compute))
+        await asyncio.sleep(0.01)
+        first.cancel()
+        return await second
+
+    assert asyncio.run(main()) == "snapshot"
+
+
+def test_set_version_invalidates_entries(tmp_path):
+    """Changing the dataset version clears the cache.
+    This test checks invalidation when the data file changes;
+    it would fail if results computed against old data were served after an update."""
+    data = tmp_path / "sales.parquet"
+    data.write_bytes(b"v1")
+    cache = ResultCache(version=dataset_fingerprint(data))
+    cache.put("k", 1)
+
+    cache.set_version(dataset_fingerprint(data))
+    assert cache.get("k") == 1
+
+    data.write_bytes(b"version 2")
+    cache.set_version(dataset_fingerprint(data))
+    assert cache.get("k") is None
+
+
+def test_normalize_filters_ignores_order_and_types():
+    """normalize_filters maps equivalent sidebar states to the same key.
+    This test checks cache key normalization;
+    it would fail if selection order or string/int inputs produced distinct keys."""
+    a = normalize_filters(["2023", "2022"], ["3", "1"], ["Books", "Beauty"], ["Asia"])
+    b = normalize_filters([2022, 2023], [1, 3], ["Beauty", "Books"], ["Asia"])
+
+    assert a == b
+    assert hash(a) == hash(b)
+
+
+def test_result_cache_dump_and_load_round_trip(tmp_path):
+    """Entries dumped to disk load back under the same keys for the same version and tag only.
+    This test checks the warm-start snapshot a restarted worker reloads;
+    it would fail if keys lost their tuple shape or a stale dump were served."""
+    filters = normalize_filters(["2023"], ["1"], ["Books"], ["Asia"])
+    cache = ResultCache(version="v1")
+    cache.put(filters, pl.DataFrame({"panel": ["totals"], "total_revenue": [1.5]}))
+    cache.put(("trend", filters, "day"), pl.DataFrame({"order_id": [3]}))
+    cache.put("not a frame", 42)
+
+    assert cache.dump(tmp_path, tag="q1") == 2
+
+    warm = ResultCache(version="v1")
+    assert warm.load(tmp_path, tag="q1") == 2
+    assert warm.get(filters).equals(cache.get(filters))
+    assert ("trend", filters, "day") in warm and "not a frame" not in warm
+    assert ResultCache(version="v2").load(tmp_path, tag="q1") == 0
+    assert ResultCache(version="v1").load(tmp_path, tag="q2") == 0
@@ -0,0 +1,117 @@
+import asyncio
+import sys
+import os
+import threading
+import time
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from db import QueryPool
+
+
+def test_query_pool_uses_one_cursor_per_thread():
+    """QueryPool gives each worker thread its own cursor on the shared database.
+    This test checks that pooled queries see the same tables through distinct cursors;
+    it would fail if threads shared one connection or cursors pointed at separate databases."""
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT range AS x FROM range(10)")
+    pool = QueryPool(con, max_workers=2)
+    seen = []
+
+    def count(cur):
+        seen.append((threading.get_ident(), id(cur)))
+        time.sleep(0.05)
+        return cur.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+    async def main():
+        return await asyncio.gather(*(pool.run_async(count) for _ in range(4)))
+
+    assert asyncio.run(main()) == [10, 10, 10, 10]
+    cursors_by_thread = {}
+    for thread, cursor in seen:
+        cursors_by_thread.setdefault(thread, set()).add(cursor)
+    assert len(cursors_by_thread) == 2
+    assert all(len(c) == 1 for c in cursors_by_thread.values())
+    pool.shutdown()
+
+
+def test_query_pool_does_not_block_event_loop():
+    """A slow pooled query leaves the event loop free for other work.
+    This test checks that queries run off the loop;
+    it would fail if run_async executed the query synchronously on the loop thread."""
+    pool = QueryPool(duckdb.connect(), max_workers=1)
+    ticks = []
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        slow = pool.run_async(lambda cur: time.sleep(0.2))
+        await asyncio.gather(slow, ticker())
+
+    asyncio.run(main())
+    assert len(ticks) == 5
+    assert ticks[-1] - ticks[0] < 0.15
+    pool.shutdown()
+
+
+def test_query_pool_swap_lets_running_queries_finish_on_the_old_database():
+    """swap() sends new queries to another database without interrupting running ones.
+    This test checks a query in flight during a reload still answers from the old data while the next one sees the new data;
+    it would fail if swapping closed cursors under running queries or kept serving stale cursors."""
+    old, new = duckdb.connect(), duckdb.connect()
+    old.execute("CREATE TABLE t AS SELECT 1 AS x")
+    new.execute("CREATE TABLE t AS SELECT range AS x FROM range(2)")
+    pool = QueryPool(old, max_workers=1)
+
+    def slow_count(cur):
+        time.sleep(0.2)
+        return cur.execute("SELECT COUNT(*) FROM t").fetchone()[0]
+
+    async def main():
+        running = asyncio.ensure_future(pool.run_async(slow_count))
+        await asyncio.sleep(0.05)
+        pool.swap(new)
+        return await running, await pool.run_async(slow_count), pool.run(slow_count)
+
+    assert asyncio.run(main()) == (1, 2, 2)
+    assert pool.generation == 1
+    pool.shutdown()
+
+
+def test_query_pool_streams_generators_off_the_event_loop():
+    """stream_async runs each step of a cursor generator on the pool and closes its cursor afterwards.
+    This test checks that a slow export leaves the loop free and yields every item;
+    it would fail if batches were fetched on the loop thread or the export's cursor leaked."""
+    con = duckdb.connect()
+    con.execute("CREATE TABLE t AS SELECT range AS x FROM range(3)")
+    pool = QueryPool(con, max_workers=1)
+    cursors, ticks = [], []
+
+    def slow_rows(cur):
+        cursors.append(cur)
+        for (x,) in cur.execute("SELECT x FROM t ORDER BY x").fetchall():
+            time.sleep(0.05)
+            yield x
+
+    async def ticker():
+        for _ in range(5):
+            ticks.append(time.perf_counter())
+            await asyncio.sleep(0.01)
+
+    async def main():
+        async def collect():
+            return [x async for x in pool.stream_async(slow_rows)]
+        rows, _ = await asyncio.gather(collect(), ticker())
+        return rows
+
+    assert asyncio.run(main()) == [0, 1, 2]
+    assert ticks[-1] - ticks[0] < 0.1
+    with pytest.raises(duckdb.ConnectionException):
+        cursors[0].execute("SELECT 1")
+    pool.shutdown()
@@ -0,0 +1,62 @@
+import asyncio
+import sys
+import os
+
+from shiny import reactive
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from debounce import debounce
+
+DELAY_S = 0.1
+
+
+async def _settle():
+    await asyncio.sleep(DELAY_S * 2)
+    await reactive.flush()
+
+
+def _run(changes):
+    """Feed `changes` into a debounced calc in quick succession; return what a consumer saw."""
+    async def main():
+        source = reactive.value(0)
+        seen = []
+
+        @debounce(DELAY_S)
+        def debounced():
+            return source()
+
+        @reactive.effect
+        def _consumer():
+            seen.append(debounced())
+
+        await reactive.flush()
+        for value in changes:
+            source.set(value)
+            await reactive.flush()
+            await asyncio.sleep(DELAY_S / 10)
+        await _settle()
+        return seen
+
+    return asyncio.run(main())
+
+
+def test_debounce_publishes_first_value_immediately():
+    """The first value of a debounced calc is available without waiting.
+    This test checks that debouncing does not delay the dashboard's first render;
+    it would fail if the initial filters waited for the debounce delay."""
+    assert _run([]) == [0]
+
+
+def test_debounce_coalesces_a_burst_into_its_final_value():
+    """A burst of rapid changes reaches consumers once, as its final value.
+    This test checks that intermediate sidebar states never trigger a recomputation;
+    it would fail if each checkbox click recomputed the dashboard."""
+    assert _run([1, 2, 3, 4]) == [0, 4]
+
+
+def test_debounce_skips_burst_ending_at_the_published_value():
+    """A burst that ends where it started triggers no recomputation.
+    This test checks the unchanged-state short circuit;
+    it would fail if toggling a region on and off re-rendered every panel."""
+    assert _run([1, 0]) == [0]
@@ -0,0 +1,49 @@
+import sys
+import os
+
+import numpy as np
+import polars as pl
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from downsample import lttb, downsample
+
+
+def test_lttb_keeps_endpoints_and_spikes():
+    """lttb returns n_out sorted indices including both endpoints and an isolated spike.
+    This test checks the shape-preserving property the trend chart relies on;
+    it would fail if downsampling dropped peaks like plain striding does."""
+    x = np.arange(2000)
+    y = np.sin(x / 50.0)
+    y[1234] = 10.0
+
+    keep = lttb(x, y, 100)
+
+    assert len(keep) == 100
+    assert keep[0] == 0 and keep[-1] == 1999
+    assert 1234 in keep
+    assert np.all(np.diff(keep) > 0)
+
+
+def test_lttb_leaves_short_series_alone():
+    """Series already within the point budget are returned unchanged.
+    This test checks that monthly and quarterly trends are never thinned;
+    it would fail if lttb dropped points from a short series."""
+    assert list(lttb([1, 2, 3, 4], [4, 3, 2, 1], 10)) == [0, 1, 2, 3]
+
+
+def test_downsample_limits_each_series():
+    """downsample caps every series separately and keeps datetime x values.
+    This test checks the per-category reduction of the daily trend;
+    it would fail if one long series used up the budget of the others or dates broke."""
+    days = pl.datetime_range(pl.datetime(2022, 1, 1), pl.datetime(2023, 12, 31), "1d", eager=True)
+    frame = pl.concat([
+        pl.DataFrame({"day": days, "category": c, "revenue": np.random.default_rng(0).random(len(days))})
+        for c in ["Books", "Sports"]
+    ])
+
+    reduced = downsample(frame, "day", "revenue", 200, by="category")
+
+    assert reduced.group_by("category", maintain_order=True).len()["len"].to_list() == [200, 200]
+    assert reduced["day"].dtype == frame["day"].dtype
+    assert reduced.filter(pl.col("category") == "Books")["day"].is_sorted()
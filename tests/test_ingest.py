@@ -0,0 +1,79 @@
+import sys
+import os
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from ingest import ingest_csv
+from queries import create_sales_view
+
+RAW_CSV = os.path.join(os.path.dirname(__file__), "..", "data", "raw", "amazon_sales_dataset.csv")
+
+
+@pytest.fixture
+def batches(tmp_path):
+    """Split the first rows of the raw CSV into two batches."""
+    with open(RAW_CSV) as f:
+        header, *rows = [next(f) for _ in range(401)]
+    first, second = tmp_path / "batch1.csv", tmp_path / "batch2.csv"
+    first.write_text(header + "".join(rows[:300]))
+    second.write_text(header + "".join(rows[300:]))
+    return first, second
+
+
+def test_ingest_writes_hive_partitions(batches, tmp_path):
+    """ingest_csv writes one directory per year and product category.
+    This test checks the partition layout DuckDB uses to skip files;
+    it would fail if partition columns or directory naming changed."""
+    out = tmp_path / "dataset"
+    assert ingest_csv([batches[0]], out) == 300
+
+    years = {p.name for p in out.iterdir()}
+    assert years and all(y.startswith("year=") for y in years)
+    assert all(c.name.startswith("product_category=") for y in out.iterdir() for c in y.iterdir())
+
+
+def test_ingested_files_are_sorted_by_order_date(batches, tmp_path):
+    """Every ingested file is sorted by order_date.
+    This test checks the sort order that makes row-group min/max statistics useful;
+    it would fail if rows were written in CSV order."""
+    out = tmp_path / "dataset"
+    ingest_csv([batches[0]], out)
+    con = duckdb.connect()
+
+    for path in out.glob("**/*.parquet"):
+        dates = [r[0] for r in con.execute(f"SELECT order_date FROM read_parquet('{path.as_posix()}')").fetchall()]
+        assert dates == sorted(dates)
+
+
+def test_ingest_append_adds_rows_without_rewriting(batches, tmp_path):
+    """Appending a batch keeps existing files and adds the new rows.
+    This test checks incremental ingestion;
+    it would fail if an append rebuilt or dropped the existing dataset."""
+    out = tmp_path / "dataset"
+    ingest_csv([batches[0]], out)
+    before = set(out.glob("**/*.parquet"))
+
+    assert ingest_csv([batches[1]], out, append=True) == 100
+    assert before < set(out.glob("**/*.parquet"))
+
+    con = duckdb.connect()
+    create_sales_view(con, out)
+    total, distinct = con.execute("SELECT COUNT(*), COUNT(DISTINCT order_id) FROM sales").fetchone()
+    assert total == distinct == 400
+
+
+def test_sales_view_prunes_partitions(batches, tmp_path):
+    """A narrow filter on the partitioned sales view reads only matching files.
+    This test checks Hive partition pruning through the view;
+    it would fail if the view hid the partition columns from DuckDB."""
+    out = tmp_path / "dataset"
+    ingest_csv([batches[0]], out)
+    con = duckdb.connect()
+    create_sales_view(con, out)
+
+    plan = con.execute("EXPLAIN ANALYZE SELECT COUNT(*) FROM sales WHERE year = 2023 AND product_category = 'Books'").fetchall()[0][1]
+    total_files = len(list(out.glob("**/*.parquet")))
+    assert f"Scanning Files: 1/{total_files}" in plan
@@ -0,0 +1,129 @@
+import asyncio
+import json
+import sys
+import os
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import instrument
+from db import QueryPool
+from queries import create_sales_view, build_sales_cube, query_dashboard_snapshot
+
+PARQUET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+FILTERS = ([2023], [1, 2], ["Books"], ["Asia"])
+
+
+@pytest.fixture
+def tracer(tmp_path):
+    yield instrument.configure(True, tmp_path / "traces.jsonl", slow_query_ms=0)
+    instrument.configure(False)
+
+
+def _traces(t):
+    t.close()
+    return [json.loads(line) for line in t.trace_path.read_text().splitlines()]
+
+
+def test_disabled_instrumentation_returns_originals():
+    """With instrumentation off, the wrappers hand back the objects they were given.
+    This test checks the near-zero overhead contract of the disabled path;
+    it would fail if a disabled decorator or cursor proxy still wrapped the hot path."""
+    instrument.configure(False)
+    con, app = duckdb.connect(), object()
+
+    def render():
+        return 1
+
+    assert instrument.traced("render")(render) is render
+    assert instrument.trace_cursor(con) is con
+    assert instrument.with_metrics_endpoint(app) is app
+    with instrument.span("query", "x") as span:
+        assert span.describe(42) == 42
+
+
+def test_pooled_queries_are_traced_with_rows_and_profiles(tracer):
+    """Pooled queries write a span with result size and a SQL record with the DuckDB profile.
+    This test checks the trace sink, statement attribution and slow-query profiling;
+    it would fail if statements lost their enclosing query or slow ones had no plan."""
+    con = duckdb.connect()
+    create_sales_view(con, PARQUET_PATH)
+    build_sales_cube(con)
+    pool = QueryPool(con, max_workers=1)
+
+    snapshot = asyncio.run(pool.run_async(query_dashboard_snapshot, FILTERS))
+    pool.shutdown()
+    spans = {t["kind"]: t for t in _traces(tracer)}
+
+    assert spans["query"]["name"] == "query_dashboard_snapshot"
+    assert spans["query"]["rows"] == snapshot.height
+    assert spans["sql"]["name"] == "query_dashboard_snapshot"
+    assert "sales_cube" in spans["sql"]["sql"] and spans["sql"]["profile"]["rows_returned"] == snapshot.height
+    assert 'app_span_seconds_count{kind="query",name="query_dashboard_snapshot"} 1' in tracer.metrics_text()
+
+
+def test_slow_statements_are_profiled_without_running_twice(tracer):
+    """A slow statement's profile comes from its own execution, and profiling problems never fail the query.
+    This test checks each slow SELECT runs once and a broken profiler is only noted on the span;
+    it would fail if profiling re-ran the statement or raised into the caller."""
+    con = duckdb.connect()
+    calls = []
+    con.create_function("count_call", lambda x: calls.append(x) or x, [int], int, side_effects=True)
+    cur = instrument.trace_cursor(con.cursor())
+
+    assert cur.execute("SELECT count_call(range::INTEGER) FROM range(5)").fetchall() == [(i,) for i in range(5)]
+    assert len(calls) == 5
+
+    class BrokenProfiler:
+        def __init__(self, cursor):
+            self.cursor = cursor
+
+        def execute(self, *args):
+            return self.cursor.execute(*args)
+
+        def fetchall(self):
+            return self.cursor.fetchall()
+
+        def get_profiling_information(self, **kwargs):
+            raise duckdb.Error("profiler unavailable")
+
+    broken = instrument.TracedCursor(BrokenProfiler(con.cursor()), tracer)
+    assert broken.execute("SELECT 42").fetchall() == [(42,)]
+    sql = [t for t in _traces(tracer) if t["kind"] == "sql"]
+
+    assert "count_call" in sql[0]["sql"] and sql[0]["profile"]["rows_returned"] == 5
+    assert sql[1]["profile_error"] == "Error: profiler unavailable"
+
+
+def test_traced_async_render_and_metrics_endpoint(tracer):
+    """Traced async functions keep their name and record errors, and /metrics serves the histograms.
+    This test checks what render functions and the Starlette wrapper rely on;
+    it would fail if the wrapper broke Shiny's output naming or hid the metrics route."""
+    import httpx
+    from starlette.responses import PlainTextResponse
+
+    @instrument.traced("render")
+    async def plot_trend():
+        raise RuntimeError("boom")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(plot_trend())
+    instrument.register_gauge("app_cache", "Cache counters.", lambda: {"hits": 3, "version": "abc"})
+
+    async def shiny_app(scope, receive, send):
+        await PlainTextResponse("dashboard")(scope, receive, send)
+
+    async def get(*paths):
+        transport = httpx.ASGITransport(app=instrument.with_metrics_endpoint(shiny_app))
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return [(await client.get(path)).text for path in paths]
+
+    metrics, root = asyncio.run(get("/metrics", "/"))
+
+    assert plot_trend.__name__ == "plot_trend"
+    assert 'app_span_seconds_count{kind="render",name="plot_trend"} 1' in metrics
+    assert 'app_cache{stat="hits"} 3' in metrics and "abc" not in metrics
+    assert root == "dashboard"
+    assert _traces(tracer)[0]["error"] == "RuntimeError"
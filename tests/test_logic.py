@@ -4,7 +4,7 @@ import os
 
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
 
-from app import get_metric_info
+from app import get_metric_info, base_map_figure, REGION_COUNTRY_MAPPING
 
 def test_get_metric_info_returns_revenue_settings():
     """get_metric_info returns the correct settings for revenue metric.
@@ -49,4 +49,29 @@ def test_get_metric_info_unknown_metric_defaults_to_order_logic():
     result = get_metric_info("unknown_metric")
 
     assert result["label"] == "Total Orders"
-    assert result["agg_func"] == "nunique"
\ No newline at end of file
+    assert result["agg_func"] == "nunique"
+
+
+def test_base_map_figure_has_one_trace_per_region():
+    """base_map_figure draws each region as one trace covering its countries.
+    This test checks the shape the in-place map updates rely on (trace name = region);
+    it would fail if traces were split or named differently, leaving regions un-updated."""
+    fig = base_map_figure()
+
+    assert {t.name for t in fig.data} == set(REGION_COUNTRY_MAPPING)
+    for trace in fig.data:
+        assert list(trace.locations) == REGION_COUNTRY_MAPPING[trace.name]
+        assert all(row[0] == trace.name for row in trace.customdata)
+
+
+def test_default_view_is_warm_after_import():
+    """The default dashboard view and the full-dataset AI summary are cached when the app starts.
+    This test checks that warm-start keys match what a new session asks for first;
+    it would fail if the preset filters drifted from the sidebar defaults."""
+    import app
+    from queries import normalize_filters, normalize_ai_spec
+
+    default = normalize_filters(app.year_choices, [str(m) for m in range(1, 13)], app.categories[0:3], app.regions)
+    assert default in app.snapshot_cache
+    assert ("ai_summary", normalize_ai_spec({})) in app.snapshot_cache
+    assert app.warm_start()[1] == 0
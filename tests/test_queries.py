@@ -0,0 +1,254 @@
+import sys
+import os
+import re
+
+import duckdb
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from queries import (
+    compile_filters, create_sales_view, build_sales_cube, query_totals, query_dashboard_snapshot, snapshot_panel,
+    compile_ai_filters, query_ai_count, query_ai_page, query_ai_summary, ai_summary_panel,
+    TREND_GRANULARITIES, query_trend, trend_panel,
+)
+
+PARQUET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+
+
+@pytest.fixture(scope="module")
+def con():
+    con = duckdb.connect()
+    create_sales_view(con, PARQUET_PATH)
+    assert build_sales_cube(con)
+    return con
+
+
+def test_compile_filters_returns_none_for_empty_selection():
+    """compile_filters returns None when any sidebar selection is empty.
+    This test checks the empty-filter short circuit;
+    it would fail if an empty selection produced a query that scans the table."""
+    assert compile_filters([2023], [1], [], ["Asia"]) is None
+    assert compile_filters([2023], [1], ["Books"], []) is None
+    assert compile_filters([2023], [1], ["Books"], ["Asia"]) is not None
+
+
+@pytest.mark.parametrize("source", ["sales", "sales_cube"])
+def test_compile_filters_binds_values_as_parameters(source):
+    """Different selections compile to the same SQL text with different parameters.
+    This test checks that sidebar values never reach the SQL string;
+    it would fail if values were spliced in, breaking plan reuse and quoting."""
+    sql_a, params_a = compile_filters([2023], [1], ["Kid's"], ["Asia"], source)
+    sql_b, params_b = compile_filters([2022, 2023], [1, 2], ["Books"], ["Europe"], source)
+
+    assert sql_a == sql_b
+    assert "Kid" not in sql_a
+    assert params_a["categories"] == ["Kid's"]
+    assert params_a != params_b
+
+
+def test_filter_with_quote_matches_nothing(con):
+    """A category containing a quote is matched literally, not parsed as SQL.
+    This test checks parameter binding end to end;
+    it would fail if a quote in a value could break out of the predicate."""
+    filters = ([2023], [1], ["Books' OR '1'='1"], ["Asia"])
+    assert query_totals(con, filters) == (0.0, 0)
+
+
+def test_fact_filter_prunes_row_groups_by_order_date(con):
+    """The compiled fact-table filter is pushed into the parquet scan as an order_date range.
+    This test checks sargability: the date predicate reaches row-group statistics;
+    it would fail if years were only filtered through a function of order_date."""
+    where, params = compile_filters([2023], [1], ["Books"], ["Asia"], "sales")
+    plan = con.execute(f"EXPLAIN SELECT COUNT(*) FROM sales WHERE {where}", params).fetchall()[0][1]
+    assert re.search(r"order_date\s*>=", plan)
+
+
+def test_snapshot_trend_matches_pandas_groupby(con):
+    """The snapshot's trend panel matches a pandas groupby on the filtered rows.
+    This test checks the grouping-set aggregation;
+    it would fail if the DuckDB aggregation diverged from the original pandas logic."""
+    filters = ([2022], [1, 2, 3], ["Books", "Fashion"], ["Asia", "Europe"])
+    trend = snapshot_panel(query_dashboard_snapshot(con, filters), "trend")
+
+    where, params = compile_filters(*filters, source="sales")
+    d = con.execute(f"SELECT * FROM sales WHERE {where}", params).df()
+    d["month_start"] = d["order_date"].dt.to_period("M").dt.to_timestamp()
+    expected = d.groupby(["month_start", "product_category"], as_index=False).agg({"total_revenue": "sum", "order_id": "nunique"})
+
+    assert list(trend.columns) == ["month_start", "product_category", "total_revenue", "order_id"]
+    assert trend["month_start"].to_list() == expected["month_start"].dt.to_pydatetime().tolist()
+    assert trend["total_revenue"].round(2).to_list() == expected["total_revenue"].round(2).tolist()
+    assert trend["order_id"].to_list() == expected["order_id"].tolist()
+
+
+def test_snapshot_panels_agree_with_totals(con):
+    """Every snapshot panel adds up to the filtered totals.
+    This test checks that each grouping set covers every filtered row;
+    it would fail if a panel was mislabelled or dropped rows."""
+    filters = ([2023], list(range(1, 13)), ["Electronics", "Books"], ["North America", "Asia"])
+    snapshot = query_dashboard_snapshot(con, filters)
+    revenue, orders = query_totals(con, filters)
+
+    for panel in ["trend", "trend_aggregate", "season", "payment", "region", "totals"]:
+        d = snapshot_panel(snapshot, panel)
+        assert not d.is_empty()
+        assert d["total_revenue"].sum() == pytest.approx(revenue)
+        assert d["order_id"].sum() == orders
+
+
+@pytest.mark.parametrize("panel", ["trend", "trend_aggregate", "season", "payment", "region", "totals"])
+def test_cube_snapshot_matches_fact_table_snapshot(con, panel):
+    """Snapshots answered from the rollup cube equal snapshots from the fact table.
+    This test checks that re-aggregating the cube preserves both metrics;
+    it would fail if cube keys, month buckets or order counts drifted from the raw data."""
+    filters = ([2022, 2023], [2, 6, 11], ["Sports", "Fashion"], ["Middle East", "Europe"])
+    from_cube = snapshot_panel(query_dashboard_snapshot(con, filters, "sales_cube"), panel)
+    from_fact = snapshot_panel(query_dashboard_snapshot(con, filters, "sales"), panel)
+
+    assert from_cube.drop("total_revenue").equals(from_fact.drop("total_revenue"))
+    assert from_cube["total_revenue"].to_list() == pytest.approx(from_fact["total_revenue"].to_list())
+
+
+def test_sales_cube_is_compact(con):
+    """The rollup cube has at most one row per sidebar dimension combination.
+    This test checks cube granularity;
+    it would fail if a high-cardinality column leaked into the cube key."""
+    rows, cells = con.execute("""
+        SELECT COUNT(*), COUNT(DISTINCT (year, month, product_category, customer_region, payment_method))
+        FROM sales_cube
+    """).fetchone()
+
+    assert rows == cells
+    assert rows <= 3 * 12 * 6 * 4 * 5
+
+
+def test_snapshot_season_panel_is_ordered(con):
+    """The season panel is sorted Spring to Winter.
+    This test checks season ordering for the bar chart;
+    it would fail if seasons came back in alphabetical or arbitrary order."""
+    filters = ([2022, 2023], list(range(1, 13)), ["Beauty"], ["Europe"])
+    season = snapshot_panel(query_dashboard_snapshot(con, filters), "season")
+
+    assert season["season"].cast(str).to_list() == ["Spring", "Summer", "Fall", "Winter"]
+
+
+def test_snapshot_is_empty_without_filters(con):
+    """Snapshots are empty frames with metric columns when a selection is empty.
+    This test checks the empty-selection contract used by the render functions;
+    it would fail if empty filters raised or returned frames without metric columns."""
+    filters = ([2023], [1], [], ["Asia"])
+    trend = snapshot_panel(query_dashboard_snapshot(con, filters), "trend")
+
+    assert trend.is_empty()
+    assert {"total_revenue", "order_id"}.issubset(trend.columns)
+    assert query_totals(con, filters) == (0.0, 0)
+
+
+@pytest.mark.parametrize("granularity", TREND_GRANULARITIES)
+def test_trend_buckets_add_up_to_totals(con, granularity):
+    """Every trend granularity covers all filtered revenue and orders.
+    This test checks date_trunc bucketing on the fact table and the cube;
+    it would fail if a bucket dropped rows or orders were double counted."""
+    filters = ([2022, 2023], [1, 6, 12], ["Books", "Home & Kitchen"], ["Asia", "Europe"])
+    trend = query_trend(con, filters, granularity)
+    revenue, orders = query_totals(con, filters)
+
+    for panel in ["trend", "trend_aggregate"]:
+        d = trend_panel(trend, panel)
+        assert d["total_revenue"].sum() == pytest.approx(revenue)
+        assert d["order_id"].sum() == orders
+
+
+def test_monthly_trend_matches_snapshot(con):
+    """The monthly trend from query_trend equals the snapshot's trend panel.
+    This test checks that switching granularity back to month shows the same series;
+    it would fail if the two month bucketings disagreed."""
+    filters = ([2023], list(range(1, 13)), ["Sports"], ["Middle East"])
+    trend = trend_panel(query_trend(con, filters, "month"), "trend")
+    snapshot = snapshot_panel(query_dashboard_snapshot(con, filters), "trend")
+
+    assert trend["period_start"].to_list() == snapshot["month_start"].to_list()
+    assert trend["order_id"].to_list() == snapshot["order_id"].to_list()
+
+
+def test_weekly_trend_starts_on_mondays(con):
+    """Weekly buckets start on Mondays and an unknown granularity is rejected.
+    This test checks the week bucketing pushed down to DuckDB;
+    it would fail if weeks were bucketed by calendar day or month."""
+    filters = ([2023], list(range(1, 13)), ["Books"], ["Asia"])
+    d = trend_panel(query_trend(con, filters, "week"), "trend_aggregate")
+
+    assert set(d["period_start"].dt.weekday().to_list()) == {1}
+    assert d.height <= 54
+    with pytest.raises(ValueError):
+        query_trend(con, filters, "hour")
+
+
+def test_ai_summary_matches_fact_table(con):
+    """The AI chart aggregates from the cube match pandas on the matching fact rows.
+    This test checks the grouped DuckDB scan that replaced per-session pandas filtering;
+    it would fail if cube row counts, monthly sums or seasonal averages drifted from the raw data."""
+    spec = {"years": [2023], "categories": ["Books", "Sports"], "regions": [], "payment_methods": ["UPI"]}
+    summary = query_ai_summary(con, spec)
+    trend, season = ai_summary_panel(summary, "trend"), ai_summary_panel(summary, "season")
+
+    d = con.execute("SELECT * FROM sales WHERE year = 2023 AND product_category IN ('Books', 'Sports') AND payment_method = 'UPI'").df()
+    d["month_start"] = d["order_date"].dt.to_period("M").dt.to_timestamp()
+    monthly = d.groupby(["month_start", "product_category"], as_index=False)["total_revenue"].sum()
+    seasonal = d.assign(month=d["order_date"].dt.month).query("month in (6, 7, 8)").groupby("product_category")["total_revenue"].mean()
+
+    assert trend["row_count"].sum() == season["row_count"].sum() == len(d) == query_ai_count(con, spec)
+    assert trend["total_revenue"].to_list() == pytest.approx(monthly["total_revenue"].tolist())
+    summer = season.filter(season["season"] == "Summer")
+    assert summer["avg_revenue"].to_list() == pytest.approx(seasonal.tolist())
+    from_fact = ai_summary_panel(query_ai_summary(con, spec, "sales"), "season")
+    assert from_fact["avg_revenue"].to_list() == pytest.approx(season["avg_revenue"].to_list())
+
+
+def test_ai_summary_is_empty_when_nothing_matches(con):
+    """A spec of None (an LLM error) gives empty AI chart panels.
+    This test checks the no-match state the AI charts render as "No data available";
+    it would fail if None fell back to the full dataset."""
+    summary = query_ai_summary(con, None)
+
+    assert ai_summary_panel(summary, "trend").is_empty()
+    assert ai_summary_panel(summary, "season").is_empty()
+
+
+def test_ai_count_matches_filtered_rows(con):
+    """query_ai_count counts the rows the AI filter spec selects; empty lists mean any value.
+    This test checks the COUNT query behind the AI table footer;
+    it would fail if an empty list filtered everything out or a filter was ignored."""
+    spec = {"years": [2023], "categories": ["Books"], "regions": [], "payment_methods": []}
+    expected = con.execute("SELECT COUNT(*) FROM sales WHERE year = 2023 AND product_category = 'Books'").fetchone()[0]
+
+    assert query_ai_count(con, spec) == expected
+    assert query_ai_count(con, {}) == con.execute("SELECT COUNT(*) FROM sales").fetchone()[0]
+    assert query_ai_count(con, None) == 0
+
+
+def test_ai_pages_cover_the_sorted_result_without_overlap(con):
+    """Consecutive AI table pages are disjoint and follow the requested sort.
+    This test checks the LIMIT/OFFSET window and its order_id tie-breaker;
+    it would fail if pages overlapped, skipped rows or ignored the sort."""
+    spec = {"categories": ["Books"], "regions": ["Asia"], "years": [2023]}
+    pages = [query_ai_page(con, spec, "rating", True, limit=100, offset=o) for o in range(0, 1200, 100)]
+    ids = [i for page in pages for i in page["order_id"].to_list()]
+    ratings = [r for page in pages for r in page["rating"].to_list()]
+
+    assert len(ids) == len(set(ids)) == query_ai_count(con, spec)
+    assert ratings == sorted(ratings, reverse=True)
+
+
+def test_ai_column_filter_is_pushed_down(con):
+    """The table's column filter is a case-insensitive contains match applied in SQL.
+    This test checks the pushed-down column filter and its parameter binding;
+    it would fail if the filter were case sensitive or spliced into the SQL text."""
+    where, params = compile_ai_filters({}, ("payment_method", "upi"))
+    page = query_ai_page(con, {}, column_filter=("payment_method", "upi"), limit=50)
+
+    assert "upi" not in where
+    assert set(page["payment_method"].to_list()) == {"UPI"}
+    with pytest.raises(ValueError):
+        compile_ai_filters({}, ("1; DROP TABLE sales", "x"))
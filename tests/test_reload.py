@@ -0,0 +1,111 @@
+import sys
+import os
+import shutil
+
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+from reload import DatasetWatcher
+
+
+def test_watcher_reloads_once_a_new_version_settles():
+    """DatasetWatcher calls on_change only after the version has held for two polls.
+    This test checks a drop still being written is skipped and a settled one is loaded once;
+    it would fail if a half-copied file triggered a reload or the same version reloaded twice."""
+    versions = iter(["v1", "v2", "v3", "v3", "v3", "v3"])
+    current = ["v1"]
+    loaded = []
+    watcher = DatasetWatcher(lambda: current[0], loaded.append, interval_s=0)
+
+    polls = []
+    for _ in range(5):
+        current[0] = next(versions)
+        polls.append(watcher.check())
+
+    assert polls == [False, False, False, True, False]
+    assert loaded == ["v3"]
+
+
+def test_watcher_keeps_serving_when_a_reload_fails():
+    """A failing reload is reported and the previous data stays in service.
+    This test checks the watcher warns, skips the broken version and reloads when the files change again;
+    it would fail if an exception stopped the watcher or it retried the same broken drop every poll."""
+    current = ["v1"]
+    calls = []
+
+    def on_change(version):
+        calls.append(version)
+        if version == "broken":
+            raise ValueError("corrupt parquet")
+
+    watcher = DatasetWatcher(lambda: current[0], on_change, interval_s=0)
+    current[0] = "broken"
+    watcher.check()
+    with pytest.warns(UserWarning, match="corrupt parquet"):
+        assert not watcher.check()
+    assert not watcher.check()
+
+    current[0] = "fixed"
+    watcher.check()
+    assert watcher.check()
+    assert calls == ["broken", "fixed"]
+
+
+def test_reload_swaps_in_new_data(tmp_path, monkeypatch):
+    """A reload serves the new data, sidebar choices and totals, and drops cached results of the old data.
+    This test checks reload_data(), as the watcher calls it, after the parquet and its database are rebuilt under the running app,
+    and the page a new session loads afterwards;
+    it would fail if the pool, vocabularies, cache version or sidebar choices were left pointing at the previous data,
+    or a rebuilt database were read through the instance this process already had open for its path."""
+    import asyncio
+    import duckdb
+    import httpx
+    import app
+    from build_db import build_database, read_build_info
+    from queries import normalize_filters
+
+    data = tmp_path / "amazon_sales.parquet"
+    db_path = tmp_path / "amazon_sales.duckdb"
+    source = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+    duckdb.sql(f"COPY (SELECT * FROM '{source}' WHERE year(order_date) = 2023 AND product_category <> 'Books') TO '{data}' (FORMAT parquet)")
+    build_database(data, db_path)
+    original = app.DATA_PATH, app.DUCKDB_PATH, app.DATA_STORE
+    monkeypatch.setattr(app, "WARM_START_DIR", str(tmp_path / "warm_start"))
+
+    async def reload(data_path, db_path, mode="auto"):
+        monkeypatch.setattr(app, "event_loop", asyncio.get_running_loop())
+        app.DATA_PATH, app.DUCKDB_PATH, app.DATA_STORE = data_path, db_path, mode
+        await asyncio.to_thread(app.reload_data, app.store_version(data_path, db_path))
+
+    async def get_page(asgi_app):
+        transport = httpx.ASGITransport(app=asgi_app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://app") as client:
+            return (await client.get("/")).text
+
+    generation = app.data_generation
+    try:
+        asyncio.run(reload(data, db_path))
+        assert app.data_generation == generation + 1
+        assert read_build_info(app.con)["source_fingerprint"] == app.dataset_fingerprint(data)
+        assert app.year_choices == ["2023"]
+        assert "Books" not in app.categories
+        assert app.overall_orders == app.query_pool.run(lambda cur: cur.execute("SELECT COUNT(*) FROM sales").fetchone()[0])
+        assert app.DEFAULT_FILTERS == normalize_filters(["2023"], range(1, 13), app.categories[0:3], app.regions)
+        assert app.snapshot_cache.version == app.dataset_fingerprint(data)
+        assert app.DEFAULT_FILTERS in app.snapshot_cache
+        page = asyncio.run(get_page(app.app))
+        assert 'name="input_year" value="2023"' in page and 'name="input_year" value="2022"' not in page
+        assert 'value="Books"' not in page and f'value="{app.categories[0]}"' in page
+
+        # src/ingest.py then src/build_db.py while the app still has the old database open
+        shutil.copy(source, tmp_path / "incoming.parquet")
+        os.replace(tmp_path / "incoming.parquet", data)
+        build_database(data, db_path)
+        asyncio.run(reload(data, db_path))
+        assert read_build_info(app.con)["source_fingerprint"] == app.dataset_fingerprint(data)
+        assert "2022" in app.year_choices and "Books" in app.categories
+        assert app.overall_orders == 50000
+    finally:
+        asyncio.run(reload(*original))
+    assert app.overall_orders == 50000
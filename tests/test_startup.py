@@ -0,0 +1,85 @@
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import websockets
+
+SRC_DIR = Path(__file__).resolve().parents[1] / "src"
+
+# Generous defaults so slow CI machines pass; tighten locally via the env vars
+IMPORT_BUDGET_S = float(os.getenv("STARTUP_IMPORT_BUDGET_S", "6"))
+FIRST_RENDER_BUDGET_S = float(os.getenv("STARTUP_FIRST_RENDER_BUDGET_S", "15"))
+
+
+def test_app_import_is_lazy_and_within_budget():
+    """Importing app.py stays under the import-time budget without loading pandas or matplotlib.
+    This test checks lazy startup: no full-frame materialization and no unused heavy imports;
+    it would fail if module-level code built a pandas frame or imported matplotlib."""
+    code = (
+        "import json, sys, time\n"
+        "t = time.perf_counter()\n"
+        "import app\n"
+        "elapsed = time.perf_counter() - t\n"
+        "print(json.dumps({'elapsed': elapsed,"
+        " 'pandas_loaded': 'pandas.core.frame' in sys.modules,"
+        " 'matplotlib': 'matplotlib' in sys.modules}))\n"
+    )
+    out = subprocess.run([sys.executable, "-c", code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert not result["pandas_loaded"]
+    assert not result["matplotlib"]
+    assert result["elapsed"] < IMPORT_BUDGET_S
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+async def _first_value_box(port, deadline):
+    while True:
+        try:
+            ws = await websockets.connect(f"ws://127.0.0.1:{port}/websocket/")
+            break
+        except OSError:
+            if time.perf_counter() > deadline:
+                raise
+            await asyncio.sleep(0.05)
+
+    async with ws:
+        await ws.send(json.dumps({"method": "init", "data": {
+            "input_year": ["2022", "2023", "2024"], "input_month": [str(m) for m in range(1, 13)],
+            "input_category": ["Beauty", "Books", "Electronics"],
+            "input_region": ["Asia", "Europe", "Middle East", "North America"],
+            "input_metric": "total_revenue", "input_season": True,
+            ".clientdata_output_valuebox_revenue_hidden": False,
+        }}))
+        while True:
+            message = json.loads(await asyncio.wait_for(ws.recv(), deadline - time.perf_counter()))
+            if "valuebox_revenue" in message.get("values", {}):
+                return
+
+
+def test_time_to_first_render_within_budget():
+    """A fresh app process renders the first value box within the budget.
+    This test checks cold start end to end: process start, import, data setup and first render;
+    it would fail if startup or the default dashboard query became much slower."""
+    port = _free_port()
+    start = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "shiny", "run", "--port", str(port), str(SRC_DIR / "app.py")],
+        stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    try:
+        asyncio.run(_first_value_box(port, start + FIRST_RENDER_BUDGET_S))
+        assert time.perf_counter() - start < FIRST_RENDER_BUDGET_S
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
@@ -0,0 +1,88 @@
+import sys
+import os
+import shutil
+
+import json
+
+import pyarrow as pa
+import pytest
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "../src")))
+
+import instrument
+from build_db import build_database, export_arrow
+from db import QueryPool
+from queries import query_ai_count, query_dashboard_snapshot, query_totals, snapshot_panel
+from store import open_store
+
+PARQUET_PATH = os.path.join(os.path.dirname(__file__), "..", "data", "processed", "amazon_sales.parquet")
+FILTERS = ([2022, 2023], [3, 4, 5], ["Books", "Sports"], ["Asia", "Europe"])
+AI_SPEC = {"years": [2023], "categories": ["Books"], "regions": ["Asia"], "payment_methods": []}
+
+
+@pytest.fixture(scope="module")
+def built(tmp_path_factory):
+    directory = tmp_path_factory.mktemp("store")
+    data = directory / "amazon_sales.parquet"
+    shutil.copy(PARQUET_PATH, data)
+    db_path = directory / "amazon_sales.duckdb"
+    build_database(data, db_path)
+    export_arrow(db_path)
+    return data, db_path
+
+
+def test_shared_store_answers_like_parquet_without_copying(built):
+    """The shared store serves `sales` from a memory-mapped Arrow file and the cube from the database.
+    This test checks pooled cursors see the same answers as the parquet store while no Arrow heap is allocated;
+    it would fail if a new cursor lost the registered table or the file were read into memory."""
+    data, db_path = built
+    before = pa.total_allocated_bytes()
+    con, source, setup = open_store(data, db_path, mode="shared")
+    assert pa.total_allocated_bytes() - before < 1024 * 1024
+    parquet, _, _ = open_store(data, db_path, mode="parquet")
+
+    pool = QueryPool(con, max_workers=1, setup=setup)
+    assert source == "sales_cube"
+    assert pool.run(query_totals, FILTERS) == pytest.approx(query_totals(parquet, FILTERS))
+    assert pool.run(query_ai_count, AI_SPEC) == query_ai_count(parquet, AI_SPEC)
+    ours = snapshot_panel(pool.run(query_dashboard_snapshot, FILTERS, "sales"), "payment")
+    theirs = snapshot_panel(query_dashboard_snapshot(parquet, FILTERS, "sales"), "payment")
+    assert ours.drop("total_revenue").equals(theirs.drop("total_revenue"))
+    assert pool.open_cursor().execute("SELECT COUNT(*) FROM sales").fetchone() == (50000,)
+    pool.shutdown()
+
+
+def test_shared_store_queries_are_profiled_when_instrumented(built, tmp_path):
+    """With INSTRUMENT on, slow statements on the shared store are profiled on the cursor that has `sales` registered.
+    This test checks fact-table queries in shared mode with every statement counted as slow;
+    it would fail if profiling ran on a cursor without the Arrow table and raised a CatalogException."""
+    data, db_path = built
+    tracer = instrument.configure(True, tmp_path / "traces.jsonl", slow_query_ms=0)
+    try:
+        con, _, setup = open_store(data, db_path, mode="shared")
+        pool = QueryPool(con, max_workers=1, setup=setup)
+        assert pool.run(query_ai_count, AI_SPEC) == 1057
+        assert pool.run(query_totals, FILTERS)[1] > 0
+        pool.shutdown()
+    finally:
+        instrument.configure(False)
+
+    sql = [json.loads(line) for line in tracer.trace_path.read_text().splitlines() if '"kind": "sql"' in line]
+    assert sql and all("profile" in t and "profile_error" not in t for t in sql)
+
+
+def test_stale_store_falls_back_to_parquet(built, tmp_path):
+    """A database and Arrow file built from other data are never served.
+    This test checks open_store warns and queries the parquet when the data changed after the build;
+    it would fail if workers kept answering from an outdated store."""
+    data, db_path = built
+    changed = tmp_path / "amazon_sales.parquet"
+    shutil.copy(data, changed)
+    os.utime(changed, ns=(0, 0))
+
+    with pytest.warns(UserWarning, match="querying parquet"):
+        con, source, setup = open_store(changed, db_path, mode="shared")
+    assert setup is None
+    assert "parquet" in con.execute("EXPLAIN SELECT * FROM sales").fetchall()[0][1].lower()
+    with pytest.raises(ValueError):
+        open_store(data, db_path, mode="memory")